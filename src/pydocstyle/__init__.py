@@ -1,6 +1,40 @@
-from ._version import __version__
+import sys as _sys
+from importlib import import_module as _import_module
 
-# Temporary hotfix for flake8-docstrings
-from .checker import ConventionChecker, check
-from .parser import AllError
-from .violations import Error, conventions
+# The public names are imported when they are first used, so that light
+# modules (e.g. the daemon client) do not pay for loading the checker.
+_LAZY_NAMES = {
+    '__version__': '._version',
+    'acheck': '.aio',
+    'check_sources': '.checker',
+    # Temporary hotfix for flake8-docstrings
+    'ConventionChecker': '.checker',
+    'check': '.checker',
+    'AllError': '.parser',
+    'Error': '.violations',
+    'conventions': '.violations',
+}
+
+__all__ = tuple(_LAZY_NAMES)
+
+if _sys.version_info[:2] >= (3, 7):
+
+    def __getattr__(name):
+        if name not in _LAZY_NAMES:
+            raise AttributeError(
+                f'module {__name__!r} has no attribute {name!r}'
+            )
+        module = _import_module(_LAZY_NAMES[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(globals()) | set(_LAZY_NAMES))
+
+else:  # pragma: no cover
+    from ._version import __version__
+    from .aio import acheck
+    from .checker import ConventionChecker, check, check_sources
+    from .parser import AllError
+    from .violations import Error, conventions
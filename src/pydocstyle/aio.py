@@ -0,0 +1,97 @@
+"""Checking of files from asyncio code."""
+
+import asyncio
+import os
+from functools import partial
+from itertools import islice
+
+from .checker import _check_source_args, _get_checked_codes, _get_checker
+from .utils import log
+
+__all__ = ('acheck',)
+
+
+async def acheck(
+    filenames,
+    select=None,
+    ignore=None,
+    ignore_decorators=None,
+    property_decorators=None,
+    ignore_inline_noqa=False,
+    ignore_self_only_init=False,
+    parser='token',
+    executor=None,
+    concurrency=None,
+):
+    """Generate docstring errors that exist in `filenames`, asynchronously.
+
+    This is the asynchronous version of `check`, which takes the same
+    arguments, for use in asyncio code. The files are read in the default
+    executor of the event loop and checked in `executor`, so that the event
+    loop is never blocked. By default, the files are checked in the default
+    executor too; pass a `concurrent.futures.ProcessPoolExecutor` to check
+    files in parallel on interpreters with a global interpreter lock.
+
+    At most `concurrency` files are read or checked at the same time (twice
+    the number of CPUs by default), so that reading some files overlaps with
+    checking others. The errors of every file are generated as soon as it was
+    checked, so they are not in the order of `filenames`. No more files are
+    read while the generated errors are not consumed.
+
+    Examples
+    ---------
+    >>> async for error in acheck(['pydocstyle.py']):
+    ...     print(error)
+
+    """
+    checked_codes = _get_checked_codes(select, ignore)
+    _get_checker(parser)
+    if concurrency is None:
+        concurrency = 2 * (os.cpu_count() or 1)
+    check_args = partial(
+        _check_source_args,
+        parser=parser,
+        checked_codes=checked_codes,
+        options=(
+            ignore_decorators,
+            property_decorators,
+            ignore_inline_noqa,
+            ignore_self_only_init,
+        ),
+    )
+    loop = asyncio.get_event_loop()
+
+    async def check_file(filename):
+        try:
+            source = await loop.run_in_executor(None, _read_file, filename)
+        except OSError as error:
+            log.warning('Error in file %s: %s', filename, error)
+            return [error]
+        _, errors = await loop.run_in_executor(
+            executor, check_args, (filename, source)
+        )
+        return errors
+
+    filenames = iter(filenames)
+    pending = set()
+    try:
+        while True:
+            for filename in islice(filenames, concurrency - len(pending)):
+                pending.add(asyncio.ensure_future(check_file(filename)))
+            if not pending:
+                break
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                for error in task.result():
+                    yield error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _read_file(filename):
+    """Return the content of a file as bytes."""
+    with open(filename, 'rb') as file:
+        return file.read()
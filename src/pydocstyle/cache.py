@@ -0,0 +1,542 @@
+"""Persistent on-disk cache of check results."""
+
+import hashlib
+import json
+import os
+import pkgutil
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from ._version import __version__
+from .utils import log
+
+__all__ = ('MemoryCache', 'ResultCache')
+
+
+class ResultCache:
+    """A cache of the reports of checked files, stored in a directory.
+
+    Reports are keyed by the file name, a hash of the file's content, the
+    effective check configuration of the file, the formatting options of the
+    run, the pydocstyle version and the wordlists used by the checks. Files
+    that did not change since they were last checked are therefore answered
+    from the cache without being parsed.
+
+    To avoid hashing unchanged files over and over, the modification time and
+    size of every file are stored along with its content hash. The hash is
+    only recomputed when either of them changed.
+
+    The cache is bounded by `max_size` bytes of stored reports. When it grows
+    beyond that, the least recently used entries are evicted.
+
+    Several processes may use the same cache at the same time: every change
+    is written in a short transaction of its own. If the cache fails, e.g.
+    because it is locked for longer than `BUSY_TIMEOUT` seconds or corrupt,
+    a warning is logged and the cache is not used for the rest of the run.
+
+    """
+
+    DATABASE_NAME = 'pydocstyle-cache.sqlite3'
+    DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+    # Evict down to this fraction of `max_size`, so that eviction does not
+    # happen on every run once the cache is full.
+    EVICTION_RATIO = 0.9
+
+    # Number of seconds to wait for other processes that write to the cache.
+    BUSY_TIMEOUT = 10.0
+
+    def __init__(
+        self,
+        directory,
+        max_size=None,
+        explain=False,
+        source=False,
+        parser='token',
+    ):
+        """Open (or create) the cache in `directory`.
+
+        `explain` and `source` are the formatting options of the run, and
+        `parser` the name of the parser it uses. They affect the stored
+        reports.
+
+        """
+        self.directory = directory
+        self.max_size = self.DEFAULT_MAX_SIZE if max_size is None else max_size
+        self.hits = self.misses = 0
+        self._used = {}
+        self._failed = False
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, self.DATABASE_NAME)
+        # Transactions are started explicitly, so that none of them is held
+        # while files are checked.
+        self._db = sqlite3.connect(
+            self.path, timeout=self.BUSY_TIMEOUT, isolation_level=None
+        )
+        self._db.executescript(
+            '''
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                digest TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                reports TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS results_last_used
+                ON results (last_used);
+            CREATE TABLE IF NOT EXISTS costs (
+                path TEXT PRIMARY KEY,
+                cost REAL NOT NULL
+            );
+            '''
+        )
+        self._salt = _get_salt(explain, source, parser)
+
+    def get(
+        self,
+        filename,
+        checked_codes,
+        ignore_decorators,
+        property_decorators,
+        ignore_self_only_init,
+    ):
+        """Return the cached reports for a file, or None if there are none.
+
+        The arguments are those generated by
+        `ConfigurationParser.get_files_to_check`.
+
+        """
+        row = None
+        if not self._failed:
+            try:
+                key, _, _ = self._get_key(
+                    filename,
+                    checked_codes,
+                    ignore_decorators,
+                    property_decorators,
+                    ignore_self_only_init,
+                )
+                if key is not None:
+                    row = self._db.execute(
+                        'SELECT reports FROM results WHERE key = ?', (key,)
+                    ).fetchone()
+            except sqlite3.Error as error:
+                self._fail(error)
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._used[key] = time.time()
+        return json.loads(row[0])
+
+    def put(
+        self,
+        reports,
+        filename,
+        checked_codes,
+        ignore_decorators,
+        property_decorators,
+        ignore_self_only_init,
+        cost=None,
+    ):
+        """Store the reports of a checked file.
+
+        Reports of files that could not be checked (which contain `None`) are
+        not stored, so that the failure is reported again on the next run.
+        `cost` is the number of seconds it took to check the file, if known.
+
+        """
+        if self._failed:
+            return
+        try:
+            with self._transaction():
+                self._put(
+                    reports,
+                    filename,
+                    checked_codes,
+                    ignore_decorators,
+                    property_decorators,
+                    ignore_self_only_init,
+                    cost,
+                )
+        except sqlite3.Error as error:
+            self._fail(error)
+
+    def _put(
+        self,
+        reports,
+        filename,
+        checked_codes,
+        ignore_decorators,
+        property_decorators,
+        ignore_self_only_init,
+        cost,
+    ):
+        """Store the reports of a checked file, see `put`."""
+        if cost is not None:
+            self._db.execute(
+                'INSERT OR REPLACE INTO costs VALUES (?, ?)',
+                (os.path.abspath(filename), cost),
+            )
+        if None in reports:
+            return
+        key, path, digest = self._get_key(
+            filename,
+            checked_codes,
+            ignore_decorators,
+            property_decorators,
+            ignore_self_only_init,
+        )
+        if key is None:
+            return
+        data = json.dumps(reports)
+        self._db.execute(
+            'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)',
+            (key, path, digest, data, len(data), time.time()),
+        )
+
+    def get_cost(self, filename):
+        """Return the seconds it took to check a file the last time, or None.
+
+        The cost is kept when the file changes, as an estimate of the cost of
+        checking it again.
+
+        """
+        if self._failed:
+            return None
+        try:
+            row = self._db.execute(
+                'SELECT cost FROM costs WHERE path = ?',
+                (os.path.abspath(filename),),
+            ).fetchone()
+        except sqlite3.Error as error:
+            self._fail(error)
+            return None
+        return None if row is None else row[0]
+
+    def close(self):
+        """Write pending changes, evict old entries and close the cache."""
+        if not self._failed:
+            try:
+                with self._transaction():
+                    self._db.executemany(
+                        'UPDATE results SET last_used = ? WHERE key = ?',
+                        (
+                            (last_used, key)
+                            for key, last_used in self._used.items()
+                        ),
+                    )
+                    self._evict(self.max_size)
+            except sqlite3.Error as error:
+                self._fail(error)
+        self._db.close()
+        log.debug('result cache: %d hits, %d misses.', self.hits, self.misses)
+
+    def stats(self):
+        """Return a dictionary of statistics about the cache."""
+        entries, size, oldest, newest = self._db.execute(
+            'SELECT COUNT(*), TOTAL(size), MIN(last_used), MAX(last_used) '
+            'FROM results'
+        ).fetchone()
+        (files,) = self._db.execute('SELECT COUNT(*) FROM files').fetchone()
+        return {
+            'path': self.path,
+            'entries': entries,
+            'size': int(size),
+            'max_size': self.max_size,
+            'files': files,
+            'oldest': oldest,
+            'newest': newest,
+        }
+
+    def prune(self):
+        """Remove stale results and evict old ones down to `max_size`.
+
+        Results are stale if their file was deleted or changed since they
+        were stored. Return the number of removed results.
+
+        """
+        deleted = [
+            (path,)
+            for (path,) in self._db.execute('SELECT path FROM files')
+            if not os.path.exists(path)
+        ]
+        with self._transaction():
+            self._db.executemany('DELETE FROM files WHERE path = ?', deleted)
+            self._db.executemany('DELETE FROM costs WHERE path = ?', deleted)
+            removed = self._db.execute(
+                'DELETE FROM results WHERE NOT EXISTS ('
+                'SELECT 1 FROM files WHERE files.path = results.path '
+                'AND files.digest = results.digest)'
+            ).rowcount
+            removed += self._evict(self.max_size * self.EVICTION_RATIO)
+        self._db.execute('VACUUM')
+        return removed
+
+    @contextmanager
+    def _transaction(self):
+        """Run the statements of the block in a single transaction."""
+        self._db.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            if self._db.in_transaction:
+                self._db.execute('ROLLBACK')
+            raise
+        self._db.execute('COMMIT')
+
+    def _fail(self, error):
+        """Stop using the cache for the rest of the run, after `error`."""
+        log.warning('Cannot use cache, checking without it: %s', error)
+        self._failed = True
+
+    def _evict(self, max_size):
+        """Evict least recently used results until they fit `max_size`."""
+        (size,) = self._db.execute(
+            'SELECT TOTAL(size) FROM results'
+        ).fetchone()
+        if size <= max_size:
+            return 0
+        target = min(max_size, self.max_size * self.EVICTION_RATIO)
+        evicted = []
+        for key, entry_size in self._db.execute(
+            'SELECT key, size FROM results ORDER BY last_used'
+        ):
+            if size <= target:
+                break
+            evicted.append((key,))
+            size -= entry_size
+        self._db.executemany('DELETE FROM results WHERE key = ?', evicted)
+        log.debug('result cache: evicted %d entries.', len(evicted))
+        return len(evicted)
+
+    def _get_digest(self, path):
+        """Return the hash of the content of the file in `path`.
+
+        The hash is taken from the cache if the file's modification time and
+        size did not change since it was last computed.
+
+        Return None if the file cannot be read.
+
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        row = self._db.execute(
+            'SELECT mtime_ns, size, digest FROM files WHERE path = ?', (path,)
+        ).fetchone()
+        if row is not None and row[:2] == (stat.st_mtime_ns, stat.st_size):
+            return row[2]
+        try:
+            with open(path, 'rb') as file:
+                digest = hashlib.sha256(file.read()).hexdigest()
+        except OSError:
+            return None
+        self._db.execute(
+            'INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)',
+            (path, stat.st_mtime_ns, stat.st_size, digest),
+        )
+        return digest
+
+    def _get_key(
+        self,
+        filename,
+        checked_codes,
+        ignore_decorators,
+        property_decorators,
+        ignore_self_only_init,
+    ):
+        """Return the key of the results for a file and its configuration.
+
+        Return a tuple of (key, path, digest), where `path` is the absolute
+        path of the file and `digest` the hash of its content. All of them are
+        None if the file cannot be read.
+
+        """
+        path = os.path.abspath(filename)
+        digest = self._get_digest(path)
+        if digest is None:
+            return None, None, None
+        config = [
+            sorted(checked_codes),
+            None if ignore_decorators is None else ignore_decorators.pattern,
+            None
+            if property_decorators is None
+            else sorted(property_decorators),
+            ignore_self_only_init,
+        ]
+        key = json.dumps([self._salt, filename, digest, config])
+        return hashlib.sha256(key.encode('utf-8')).hexdigest(), path, digest
+
+
+class MemoryCache:
+    """A cache of the reports of checked files, kept in memory.
+
+    This is the cache of long-running processes, which check the same files
+    over and over. Reports are keyed by the file name, the modification time
+    and size of the file, its effective check configuration and the
+    formatting options of the run. Only the reports of the latest version of
+    every file are kept, along with the time it took to check it.
+
+    The reports are stored in the `results` dictionary, which may be shared
+    by the caches of several runs with different formatting options.
+
+    """
+
+    def __init__(
+        self,
+        results=None,
+        explain=False,
+        source=False,
+        parser='token',
+    ):
+        """Create a cache over `results`, or over a new dictionary."""
+        # Maps the real path of every file to a [stamp, reports by key, cost]
+        # list.
+        self.results = {} if results is None else results
+        self.hits = self.misses = 0
+        self._options = (explain, source, parser)
+
+    def get(
+        self,
+        filename,
+        checked_codes,
+        ignore_decorators,
+        property_decorators,
+        ignore_self_only_init,
+    ):
+        """Return the cached reports for a file, or None if there are none.
+
+        The arguments are those generated by
+        `ConfigurationParser.get_files_to_check`.
+
+        """
+        path, stamp = self._get_path_and_stamp(filename)
+        entry = self.results.get(path)
+        reports = None
+        if entry is not None and entry[0] == stamp is not None:
+            reports = entry[1].get(
+                self._get_key(
+                    filename,
+                    checked_codes,
+                    ignore_decorators,
+                    property_decorators,
+                    ignore_self_only_init,
+                )
+            )
+        if reports is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return reports
+
+    def put(
+        self,
+        reports,
+        filename,
+        checked_codes,
+        ignore_decorators,
+        property_decorators,
+        ignore_self_only_init,
+        cost=None,
+    ):
+        """Store the reports of a checked file.
+
+        Reports of files that could not be checked (which contain `None`) are
+        not stored, so that the failure is reported again on the next run.
+        `cost` is the number of seconds it took to check the file, if known.
+
+        """
+        path, stamp = self._get_path_and_stamp(filename)
+        entry = self.results.get(path)
+        if entry is None:
+            entry = self.results[path] = [None, {}, None]
+        if cost is not None:
+            entry[2] = cost
+        if None in reports or stamp is None:
+            return
+        if entry[0] != stamp:
+            entry[:2] = stamp, {}
+        key = self._get_key(
+            filename,
+            checked_codes,
+            ignore_decorators,
+            property_decorators,
+            ignore_self_only_init,
+        )
+        entry[1][key] = reports
+
+    def get_cost(self, filename):
+        """Return the seconds it took to check a file the last time, or None."""
+        entry = self.results.get(os.path.realpath(filename))
+        return None if entry is None else entry[2]
+
+    def close(self):
+        """Log the statistics of the cache; the results are kept."""
+        log.debug('result cache: %d hits, %d misses.', self.hits, self.misses)
+
+    def prune(self):
+        """Remove the results of deleted files and return their number."""
+        deleted = [path for path in self.results if not os.path.exists(path)]
+        for path in deleted:
+            del self.results[path]
+        return len(deleted)
+
+    @staticmethod
+    def _get_path_and_stamp(filename):
+        """Return the real path of a file and its modification stamp.
+
+        The stamp is None if the file cannot be accessed.
+
+        """
+        path = os.path.realpath(filename)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return path, None
+        return path, (stat.st_mtime_ns, stat.st_size)
+
+    def _get_key(
+        self,
+        filename,
+        checked_codes,
+        ignore_decorators,
+        property_decorators,
+        ignore_self_only_init,
+    ):
+        """Return the key of the results for a file and its configuration."""
+        return (
+            self._options,
+            filename,
+            frozenset(checked_codes),
+            None if ignore_decorators is None else ignore_decorators.pattern,
+            None
+            if property_decorators is None
+            else frozenset(property_decorators),
+            ignore_self_only_init,
+        )
+
+
+def _get_salt(explain, source, parser):
+    """Return a hash of everything that affects all results.
+
+    This includes the formatting options, the parser, the pydocstyle version
+    and the wordlists used for the imperative mood check.
+
+    """
+    salt = hashlib.sha256()
+    salt.update(
+        json.dumps([__version__, explain, source, parser]).encode('utf-8')
+    )
+    for name in ('imperatives.txt', 'imperatives_blacklist.txt'):
+        salt.update(pkgutil.get_data('pydocstyle', 'data/' + name) or b'')
+    return salt.hexdigest()
@@ -1,9 +1,13 @@
 """Parsed source code checkers for docstring violations."""
 
 import ast
+import os
 import string
 import tokenize as tk
 from collections import namedtuple
+from copy import copy
+from functools import partial
+from io import BytesIO
 from itertools import chain, takewhile
 from re import compile as re
 from textwrap import dedent
@@ -11,6 +15,7 @@ from textwrap import dedent
 from . import violations
 from .config import IllegalConfiguration
 from .parser import (
+    PARSERS,
     AllError,
     Class,
     Definition,
@@ -33,13 +38,38 @@ from .utils import (
 )
 from .wordlists import IMPERATIVE_BLACKLIST, IMPERATIVE_VERBS, stem
 
-__all__ = ('check',)
+__all__ = ('check', 'check_sources')
 
+Check = namedtuple('Check', 'function kind terminal codes explanation')
+
+#: The codes that are only reported for public definitions. Definitions that
+#: are nested in functions are never public, so they are not parsed when no
+#: other codes are checked.
+PUBLIC_CODES = frozenset(
+    ('D100', 'D101', 'D102', 'D103', 'D104', 'D105', 'D106', 'D107')
+)
+
+#: The codes that are only reported for top-level definitions, and those
+#: that are only reported for modules. When no other codes are checked, the
+#: deeper definitions are not parsed.
+TOP_LEVEL_CODES = frozenset(('D100', 'D101', 'D103', 'D104'))
+MODULE_CODES = frozenset(('D100', 'D104'))
+
+
+def check_for(kind, terminal=False, codes=None):
+    """Mark a method of `ConventionChecker` as a check.
+
+    `kind` is the type of definitions the check applies to. The checks of a
+    definition stop after the first error of a `terminal` check. `codes` are
+    the error codes the check can emit; when none of them are checked, the
+    check is skipped. Checks without `codes` are always run.
+
+    """
 
-def check_for(kind, terminal=False):
     def decorator(f):
         f._check_for = kind
         f._terminal = terminal
+        f._codes = None if codes is None else frozenset(codes)
         return f
 
     return decorator
@@ -143,6 +173,15 @@ class ConventionChecker:
         r".+$"
     )
 
+    def __init__(self, parser=None):
+        """Initialize the checker.
+
+        Sources are parsed with `parser`, or with the default token based
+        parser if it is None.
+
+        """
+        self.parser = parse if parser is None else parser
+
     def check_source(
         self,
         source,
@@ -151,57 +190,153 @@ class ConventionChecker:
         property_decorators=None,
         ignore_inline_noqa=False,
         ignore_self_only_init=False,
+        checked_codes=None,
+        memo=None,
     ):
-        self.property_decorators = (
+        """Generate the violations in `source`, the content of `filename`.
+
+        If `memo` is given, it is a dictionary that maps the fingerprints of
+        the definitions of a previous version of the file, checked with the
+        same options, to their violations. Definitions whose fingerprint did
+        not change are not checked again: their violations are taken from
+        `memo`. Once all the violations were generated, `memo` is updated to
+        the current version of the file.
+
+        """
+        if checked_codes is not None:
+            checked_codes = frozenset(checked_codes)
+        # The options of the checks are set on a copy of the checker, so a
+        # checker may check several sources at the same time.
+        checker = copy(self)
+        checker.property_decorators = (
             {} if property_decorators is None else property_decorators
         )
-        self.ignore_self_only_init = ignore_self_only_init
-        module = parse(StringIO(source), filename)
+        checker.ignore_self_only_init = ignore_self_only_init
+        module = self.parser(
+            StringIO(source), filename, **_get_parse_depth(checked_codes)
+        )
+        fingerprints = {}
         for definition in module:
-            for this_check in self.checks:
+            if (
+                not ignore_inline_noqa
+                and definition.skipped_error_codes == 'all'
+            ):
+                continue
+            if ignore_decorators is not None and any(
+                len(ignore_decorators.findall(dec.name)) > 0
+                for dec in definition.decorators
+            ):
+                continue
+            if memo is not None:
+                fingerprint = definition.fingerprint
+                if fingerprint in fingerprints or fingerprint in memo:
+                    found = fingerprints.get(fingerprint)
+                    if found is None:
+                        found = fingerprints[fingerprint] = memo[fingerprint]
+                    for code, desc, context, params, explanation in found:
+                        error = violations.Error(code, desc, context, *params)
+                        error.set_context(
+                            explanation=explanation, definition=definition
+                        )
+                        yield error
+                    continue
+                found = fingerprints[fingerprint] = []
+            plan = self._get_check_plan(type(definition), checked_codes)
+            for check in plan:
                 terminate = False
-                if isinstance(definition, this_check._check_for):
-                    skipping_all = definition.skipped_error_codes == 'all'
-                    decorator_skip = ignore_decorators is not None and any(
-                        len(ignore_decorators.findall(dec.name)) > 0
-                        for dec in definition.decorators
-                    )
-                    if (
-                        ignore_inline_noqa or not skipping_all
-                    ) and not decorator_skip:
-                        error = this_check(
-                            self, definition, definition.docstring
+                error = check.function(
+                    checker, definition, definition.docstring
+                )
+                errors = error if hasattr(error, '__iter__') else [error]
+                for error in errors:
+                    if error is not None and (
+                        ignore_inline_noqa
+                        or error.code not in definition.skipped_error_codes
+                    ):
+                        error.set_context(
+                            explanation=check.explanation,
+                            definition=definition,
                         )
-                    else:
-                        error = None
-                    errors = error if hasattr(error, '__iter__') else [error]
-                    for error in errors:
-                        if error is not None and (
-                            ignore_inline_noqa
-                            or error.code not in definition.skipped_error_codes
-                        ):
-                            partition = this_check.__doc__.partition('.\n')
-                            message, _, explanation = partition
-                            error.set_context(
-                                explanation=explanation, definition=definition
+                        if memo is not None:
+                            found.append(
+                                (
+                                    error.code,
+                                    error.short_desc,
+                                    error.context,
+                                    error.parameters,
+                                    check.explanation,
+                                )
                             )
-                            yield error
-                            if this_check._terminal:
-                                terminate = True
-                                break
+                        yield error
+                        if check.terminal:
+                            terminate = True
+                            break
                 if terminate:
                     break
+        if memo is not None:
+            memo.clear()
+            memo.update(fingerprints)
 
     @property
     def checks(self):
-        all = [
-            this_check
-            for this_check in vars(type(self)).values()
-            if hasattr(this_check, '_check_for')
-        ]
-        return sorted(all, key=lambda this_check: not this_check._terminal)
+        return [check.function for check in self._get_checks()]
+
+    @classmethod
+    def _get_checks(cls):
+        """Return all checks of the checker, terminal checks first.
+
+        The list is built once per checker class.
 
-    @check_for(Definition, terminal=True)
+        """
+        if '_checks' not in vars(cls):
+            checks = [
+                Check(
+                    this_check,
+                    this_check._check_for,
+                    this_check._terminal,
+                    this_check._codes,
+                    this_check.__doc__.partition('.\n')[2],
+                )
+                for this_check in vars(cls).values()
+                if hasattr(this_check, '_check_for')
+            ]
+            cls._checks = sorted(checks, key=lambda check: not check.terminal)
+        return cls._checks
+
+    @classmethod
+    def _get_check_plan(cls, definition_type, checked_codes=None):
+        """Return the checks to run on definitions of `definition_type`.
+
+        If `checked_codes` is a frozenset, checks that cannot emit any of
+        these codes are left out. Terminal checks are always kept, since
+        their errors stop the following checks even when they are not
+        reported.
+
+        The plan is built once per checker class, definition type and set of
+        checked codes, so checking a definition does not need to look for its
+        checks.
+
+        """
+        plans = vars(cls).get('_check_plans')
+        if plans is None:
+            plans = cls._check_plans = {}
+        try:
+            return plans[definition_type, checked_codes]
+        except KeyError:
+            plan = plans[definition_type, checked_codes] = tuple(
+                check
+                for check in cls._get_checks()
+                if issubclass(definition_type, check.kind)
+                and (
+                    checked_codes is None
+                    or check.terminal
+                    or check.codes is None
+                    or not check.codes.isdisjoint(checked_codes)
+                )
+            )
+            return plan
+
+    @check_for(Definition, terminal=True, codes=PUBLIC_CODES)
     def check_docstring_missing(self, definition, docstring):
         """D10{0,1,2,3}: Public definitions should have docstrings.
 
@@ -246,7 +381,7 @@ class ConventionChecker:
             }
             return codes[type(definition)]()
 
-    @check_for(Definition, terminal=True)
+    @check_for(Definition, terminal=True, codes=('D419',))
     def check_docstring_empty(self, definition, docstring):
         """D419: Docstring is empty.
 
@@ -255,10 +390,10 @@ class ConventionChecker:
         NOTE: This used to report as D10X errors.
 
         """
-        if docstring and is_blank(ast.literal_eval(docstring)):
+        if docstring and not docstring.stripped:
             return violations.D419()
 
-    @check_for(Definition)
+    @check_for(Definition, codes=('D200',))
     def check_one_liners(self, definition, docstring):
         """D200: One-liner docstrings should fit on one line with quotes.
 
@@ -267,13 +402,13 @@ class ConventionChecker:
 
         """
         if docstring:
-            lines = ast.literal_eval(docstring).split('\n')
+            lines = docstring.lines
             if len(lines) > 1:
                 non_empty_lines = sum(1 for l in lines if not is_blank(l))
                 if non_empty_lines == 1:
                     return violations.D200(len(lines))
 
-    @check_for(Function)
+    @check_for(Function, codes=('D201', 'D202'))
     def check_no_blank_before(self, function, docstring):  # def
         """D20{1,2}: No blank lines allowed around function/method docstring.
 
@@ -281,9 +416,11 @@ class ConventionChecker:
         followed by an inner function or class.
         """
         if docstring:
-            before, _, after = function.source.partition(docstring)
-            blanks_before = list(map(is_blank, before.split('\n')[:-1]))
-            blanks_after = list(map(is_blank, after.split('\n')[1:]))
+            after = function.lines_after_docstring
+            blanks_before = list(
+                map(is_blank, function.lines_before_docstring)
+            )
+            blanks_after = list(map(is_blank, after[1:]))
             blanks_before_count = sum(takewhile(bool, reversed(blanks_before)))
             blanks_after_count = sum(takewhile(bool, blanks_after))
             if blanks_before_count != 0:
@@ -294,11 +431,13 @@ class ConventionChecker:
                 # class.
                 if not (
                     blanks_after_count == 1
-                    and re(r"\s+(?:(?:class|def|async def)\s|@)").match(after)
+                    and re(r"\s+(?:(?:class|def|async def)\s|@)").match(
+                        ''.join(after[:3])
+                    )
                 ):
                     yield violations.D202(blanks_after_count)
 
-    @check_for(Class)
+    @check_for(Class, codes=('D203', 'D204', 'D211'))
     def check_blank_before_after_class(self, class_, docstring):
         """D20{3,4}: Class docstring should have 1 blank line around them.
 
@@ -319,9 +458,10 @@ class ConventionChecker:
         # # comment here
         # def foo(): pass
         if docstring:
-            before, _, after = class_.source.partition(docstring)
-            blanks_before = list(map(is_blank, before.split('\n')[:-1]))
-            blanks_after = list(map(is_blank, after.split('\n')[1:]))
+            blanks_before = list(map(is_blank, class_.lines_before_docstring))
+            blanks_after = list(
+                map(is_blank, class_.lines_after_docstring[1:])
+            )
             blanks_before_count = sum(takewhile(bool, reversed(blanks_before)))
             blanks_after_count = sum(takewhile(bool, blanks_after))
             if blanks_before_count != 0:
@@ -331,7 +471,7 @@ class ConventionChecker:
             if not all(blanks_after) and blanks_after_count != 1:
                 yield violations.D204(blanks_after_count)
 
-    @check_for(Definition)
+    @check_for(Definition, codes=('D205',))
     def check_blank_after_summary(self, definition, docstring):
         """D205: Put one blank line between summary line and description.
 
@@ -343,7 +483,7 @@ class ConventionChecker:
 
         """
         if docstring:
-            lines = ast.literal_eval(docstring).strip().split('\n')
+            lines = docstring.stripped_lines
             if len(lines) > 1:
                 post_summary_blanks = list(map(is_blank, lines[1:]))
                 blanks_count = sum(takewhile(bool, post_summary_blanks))
@@ -353,11 +493,9 @@ class ConventionChecker:
     @staticmethod
     def _get_docstring_indent(definition, docstring):
         """Return the indentation of the docstring's opening quotes."""
-        before_docstring, _, _ = definition.source.partition(docstring)
-        _, _, indent = before_docstring.rpartition('\n')
-        return indent
+        return definition.docstring_indent
 
-    @check_for(Definition)
+    @check_for(Definition, codes=('D206', 'D207', 'D208'))
     def check_indent(self, definition, docstring):
         """D20{6,7,8}: The entire docstring should be indented same as code.
 
@@ -367,7 +505,7 @@ class ConventionChecker:
         """
         if docstring:
             indent = self._get_docstring_indent(definition, docstring)
-            lines = docstring.split('\n')
+            lines = docstring.literal_lines
             if len(lines) > 1:
                 # First line and line continuations need no indent.
                 lines = [
@@ -385,7 +523,7 @@ class ConventionChecker:
                 if len(indents) > 0 and min(indents) < indent:
                     yield violations.D207()
 
-    @check_for(Definition)
+    @check_for(Definition, codes=('D209',))
     def check_newline_after_last_paragraph(self, definition, docstring):
         """D209: Put multi-line docstring closing quotes on separate line.
 
@@ -394,20 +532,16 @@ class ConventionChecker:
 
         """
         if docstring:
-            lines = [
-                l
-                for l in ast.literal_eval(docstring).split('\n')
-                if not is_blank(l)
-            ]
+            lines = [l for l in docstring.lines if not is_blank(l)]
             if len(lines) > 1:
-                if docstring.split("\n")[-1].strip() not in ['"""', "'''"]:
+                if docstring.literal_lines[-1].strip() not in ['"""', "'''"]:
                     return violations.D209()
 
-    @check_for(Definition)
+    @check_for(Definition, codes=('D210',))
     def check_surrounding_whitespaces(self, definition, docstring):
         """D210: No whitespaces allowed surrounding docstring text."""
         if docstring:
-            lines = ast.literal_eval(docstring).split('\n')
+            lines = docstring.lines
             if (
                 lines[0].startswith(' ')
                 or len(lines) == 1
@@ -415,7 +549,7 @@ class ConventionChecker:
             ):
                 return violations.D210()
 
-    @check_for(Definition)
+    @check_for(Definition, codes=('D212', 'D213'))
     def check_multi_line_summary_start(self, definition, docstring):
         """D21{2,3}: Multi-line docstring summary style check.
 
@@ -435,15 +569,14 @@ class ConventionChecker:
                 "ur'''",
             ]
 
-            lines = ast.literal_eval(docstring).split('\n')
-            if len(lines) > 1:
-                first = docstring.split("\n")[0].strip().lower()
+            if len(docstring.lines) > 1:
+                first = docstring.literal_lines[0].strip().lower()
                 if first in start_triple:
                     return violations.D212()
                 else:
                     return violations.D213()
 
-    @check_for(Definition)
+    @check_for(Definition, codes=('D300',))
     def check_triple_double_quotes(self, definition, docstring):
         r'''D300: Use """triple double quotes""".
 
@@ -457,7 +590,7 @@ class ConventionChecker:
 
         '''
         if docstring:
-            if '"""' in ast.literal_eval(docstring):
+            if '"""' in docstring.value:
                 # Allow ''' quotes if docstring contains """, because
                 # otherwise """ quotes could not be expressed inside
                 # docstring. Not in PEP 257.
@@ -470,7 +603,7 @@ class ConventionChecker:
                 illegal_quotes = illegal_matcher.match(docstring).group(1)
                 return violations.D300(illegal_quotes)
 
-    @check_for(Definition)
+    @check_for(Definition, codes=('D301',))
     def check_backslashes(self, definition, docstring):
         r'''D301: Use r""" if any backslashes in a docstring.
 
@@ -501,11 +634,11 @@ class ConventionChecker:
 
         """
         if docstring:
-            summary_line = ast.literal_eval(docstring).strip().split('\n')[0]
+            summary_line = docstring.summary
             if not summary_line.endswith(chars):
                 return violation(summary_line[-1])
 
-    @check_for(Definition)
+    @check_for(Definition, codes=('D400',))
     def check_ends_with_period(self, definition, docstring):
         """D400: First line should end with a period.
 
@@ -514,7 +647,7 @@ class ConventionChecker:
         """
         return self._check_ends_with(docstring, '.', violations.D400)
 
-    @check_for(Definition)
+    @check_for(Definition, codes=('D415',))
     def check_ends_with_punctuation(self, definition, docstring):
         """D415: should end with proper punctuation.
 
@@ -526,7 +659,7 @@ class ConventionChecker:
             docstring, ('.', '!', '?'), violations.D415
         )
 
-    @check_for(Function)
+    @check_for(Function, codes=('D401',))
     def check_imperative_mood(self, function, docstring):  # def context
         """D401: First line should be in imperative mood: 'Do', not 'Does'.
 
@@ -540,9 +673,8 @@ class ConventionChecker:
             and not function.is_test
             and not function.is_property(self.property_decorators)
         ):
-            stripped = ast.literal_eval(docstring).strip()
-            if stripped:
-                first_word = strip_non_alphanumeric(stripped.split()[0])
+            if docstring.stripped:
+                first_word = strip_non_alphanumeric(docstring.first_word)
                 check_word = first_word.lower()
 
                 if check_word in IMPERATIVE_BLACKLIST:
@@ -557,7 +689,7 @@ class ConventionChecker:
                     )
                     return violations.D401(best.capitalize(), first_word)
 
-    @check_for(Function)
+    @check_for(Function, codes=('D402',))
     def check_no_signature(self, function, docstring):  # def context
         """D402: First line should not be function's or method's "signature".
 
@@ -566,11 +698,11 @@ class ConventionChecker:
 
         """
         if docstring:
-            first_line = ast.literal_eval(docstring).strip().split('\n')[0]
+            first_line = docstring.summary
             if function.name + '(' in first_line.replace(' ', ''):
                 return violations.D402()
 
-    @check_for(Function)
+    @check_for(Function, codes=('D403',))
     def check_capitalized(self, function, docstring):
         """D403: First word of the first line should be properly capitalized.
 
@@ -578,7 +710,7 @@ class ConventionChecker:
 
         """
         if docstring:
-            first_word = ast.literal_eval(docstring).split()[0]
+            first_word = docstring.first_word
             if first_word == first_word.upper():
                 return
             for char in first_word:
@@ -587,7 +719,7 @@ class ConventionChecker:
             if first_word != first_word.capitalize():
                 return violations.D403(first_word.capitalize(), first_word)
 
-    @check_for(Function)
+    @check_for(Function, codes=('D418',))
     def check_if_needed(self, function, docstring):
         """D418: Function decorated with @overload shouldn't contain a docstring.
 
@@ -599,7 +731,7 @@ class ConventionChecker:
         if docstring and function.is_overload:
             return violations.D418()
 
-    @check_for(Definition)
+    @check_for(Definition, codes=('D404',))
     def check_starts_with_this(self, function, docstring):
         """D404: First word of the docstring should not be `This`.
 
@@ -610,11 +742,10 @@ class ConventionChecker:
         if not docstring:
             return
 
-        stripped = ast.literal_eval(docstring).strip()
-        if not stripped:
+        if not docstring.stripped:
             return
 
-        first_word = strip_non_alphanumeric(stripped.split()[0])
+        first_word = strip_non_alphanumeric(docstring.first_word)
         if first_word.lower() == 'this':
             return violations.D404()
 
@@ -980,7 +1111,9 @@ class ConventionChecker:
 
         """
         if isinstance(definition, Function):
-            function_args = get_function_args(definition.source)
+            function_args = definition.function_args
+            if function_args is None:
+                function_args = get_function_args(definition.source)
             # If the method isn't static, then we skip the first
             # positional argument as it is `cls` or `self`
             if definition.kind == 'method' and not definition.is_static:
@@ -1144,13 +1277,31 @@ class ConventionChecker:
         ):
             yield from self._check_google_section(docstring, definition, ctx)
 
-    @check_for(Definition)
+    @check_for(
+        Definition,
+        codes=(
+            'D214',
+            'D215',
+            'D405',
+            'D406',
+            'D407',
+            'D408',
+            'D409',
+            'D410',
+            'D411',
+            'D412',
+            'D413',
+            'D414',
+            'D416',
+            'D417',
+        ),
+    )
     def check_docstring_sections(self, definition, docstring):
         """Check for docstring sections."""
         if not docstring:
             return
 
-        lines = docstring.split("\n")
+        lines = docstring.literal_lines
         if len(lines) < 2:
             return
 
@@ -1178,6 +1329,8 @@ def check(
     property_decorators=None,
     ignore_inline_noqa=False,
     ignore_self_only_init=False,
+    parser='token',
+    memo=None,
 ):
     """Generate docstring errors that exist in `filenames` iterable.
 
@@ -1199,6 +1352,14 @@ def check(
 
     `ignore_self_only_init` controls if D107 is reported on __init__ only containing `self`.
 
+    `parser` is the name of the parser that is used to parse the files, one
+    of the keys of `pydocstyle.parser.PARSERS`.
+
+    `memo` is an optional dictionary in which the violations of the checked
+    definitions are kept. When the same dictionary is passed to later calls,
+    only the definitions that changed since then are checked again, and the
+    violations of the others are taken from it.
+
     Examples
     ---------
     >>> check(['pydocstyle.py'])
@@ -1211,6 +1372,109 @@ def check(
     <generator object check at 0x...>
 
     """
+    checked_codes = _get_checked_codes(select, ignore)
+    checker = _get_checker(parser)
+    options = (
+        ignore_decorators,
+        property_decorators,
+        ignore_inline_noqa,
+        ignore_self_only_init,
+    )
+    memo_key = (
+        checked_codes,
+        None if ignore_decorators is None else ignore_decorators.pattern,
+        None
+        if property_decorators is None
+        else frozenset(property_decorators),
+        ignore_inline_noqa,
+        ignore_self_only_init,
+        parser,
+    )
+
+    for filename in filenames:
+        file_memo = None
+        if memo is not None:
+            # The memo of every file is only valid for the same options.
+            path = os.path.realpath(filename)
+            if path not in memo or memo[path][0] != memo_key:
+                memo[path] = (memo_key, {})
+            file_memo = memo[path][1]
+        yield from _check_source(
+            checker, filename, None, checked_codes, options, file_memo
+        )
+
+
+def check_sources(
+    sources,
+    select=None,
+    ignore=None,
+    ignore_decorators=None,
+    property_decorators=None,
+    ignore_inline_noqa=False,
+    ignore_self_only_init=False,
+    parser='token',
+    jobs=1,
+):
+    """Generate the docstring errors of in-memory sources.
+
+    `sources` is an iterable of (filename, source) tuples, where the source
+    is either text or bytes, which are decoded like Python decodes files.
+    The filenames are used in the reported errors, and to decide whether
+    modules are public; the files are not read.
+
+    Generate a (filename, errors) tuple for every source, in the order of
+    `sources`. `errors` is the list of errors that `check` would generate for
+    the source. The other arguments are those of `check`: the checked codes,
+    the parser and the checker are set up once for all of the sources.
+
+    If `jobs` is larger than 1, the sources are checked by a pool of `jobs`
+    processes, or threads on free-threaded builds of CPython.
+
+    Examples
+    ---------
+    >>> check_sources([('example.py', 'def foo(): pass')])
+    <generator object check_sources at 0x...>
+
+    """
+    checked_codes = _get_checked_codes(select, ignore)
+    options = (
+        ignore_decorators,
+        property_decorators,
+        ignore_inline_noqa,
+        ignore_self_only_init,
+    )
+    checker = _get_checker(parser)
+    if jobs > 1:
+        from .parallel import imap_in_pool
+
+        yield from imap_in_pool(
+            partial(
+                _check_source_args,
+                parser=parser,
+                checked_codes=checked_codes,
+                options=options,
+            ),
+            sources,
+            jobs,
+        )
+        return
+    for filename, source in sources:
+        yield filename, list(
+            _check_source(checker, filename, source, checked_codes, options)
+        )
+
+
+def _check_source_args(filename_and_source, parser, checked_codes, options):
+    """Return the (filename, errors) tuple of a source in a worker process."""
+    filename, source = filename_and_source
+    checker = _get_checker(parser)
+    return filename, list(
+        _check_source(checker, filename, source, checked_codes, options)
+    )
+
+
+def _get_checked_codes(select, ignore):
+    """Return the set of codes to check for `select` and `ignore`."""
     if select is not None and ignore is not None:
         raise IllegalConfiguration(
             'Cannot pass both select and ignore. '
@@ -1224,28 +1488,84 @@ def check(
         )
     else:
         checked_codes = violations.conventions.pep257
+    return frozenset(checked_codes)
 
-    for filename in filenames:
-        log.info('Checking file %s.', filename)
-        try:
+
+def _get_parse_depth(checked_codes):
+    """Return the parser arguments that limit parsing to `checked_codes`.
+
+    Only the definitions for which some of the codes can be reported are
+    parsed. All of them are parsed if `checked_codes` is None.
+
+    """
+    if checked_codes is None:
+        return {}
+    if checked_codes <= MODULE_CODES:
+        return {'depth': 0}
+    if checked_codes <= TOP_LEVEL_CODES:
+        return {'depth': 1}
+    return {'nested': not checked_codes <= PUBLIC_CODES}
+
+
+def _get_checker(parser):
+    """Return a `ConventionChecker` that uses the parser named `parser`."""
+    if parser not in PARSERS:
+        raise IllegalConfiguration(
+            "Illegal parser '{}'. Possible parsers: {}".format(
+                parser, ', '.join(PARSERS)
+            )
+        )
+    return ConventionChecker(PARSERS[parser]())
+
+
+def _check_source(
+    checker, filename, source, checked_codes, options, memo=None
+):
+    """Generate the errors of a single file, for `check` and `check_sources`.
+
+    `source` is the content of the file, as text or bytes, or None to read
+    it from `filename`. `options` are the ignore_decorators,
+    property_decorators, ignore_inline_noqa and ignore_self_only_init
+    arguments of `check`.
+
+    """
+    log.info('Checking file %s.', filename)
+    try:
+        if source is None:
             with tk.open(filename) as file:
                 source = file.read()
-            for error in ConventionChecker().check_source(
-                source,
-                filename,
-                ignore_decorators,
-                property_decorators,
-                ignore_inline_noqa,
-                ignore_self_only_init,
-            ):
-                code = getattr(error, 'code', None)
-                if code in checked_codes:
-                    yield error
-        except (OSError, AllError, ParseError) as error:
-            log.warning('Error in file %s: %s', filename, error)
-            yield error
-        except tk.TokenError:
-            yield SyntaxError('invalid syntax in file %s' % filename)
+        else:
+            source = _decode_source(source)
+        for error in checker.check_source(
+            source, filename, *options, checked_codes, memo
+        ):
+            code = getattr(error, 'code', None)
+            if code in checked_codes:
+                yield error
+    except (OSError, AllError, ParseError) as error:
+        log.warning('Error in file %s: %s', filename, error)
+        yield error
+    except tk.TokenError:
+        yield SyntaxError('invalid syntax in file %s' % filename)
+
+
+def _decode_source(source):
+    """Return the text of an in-memory source, with universal newlines.
+
+    Bytes are decoded with the encoding declared in the source, like
+    `tokenize.open` decodes files. Raise `ParseError` if they cannot be
+    decoded.
+
+    """
+    if isinstance(source, bytes):
+        try:
+            encoding, _ = tk.detect_encoding(BytesIO(source).readline)
+            source = source.decode(encoding)
+        except (SyntaxError, UnicodeDecodeError) as error:
+            raise ParseError() from error
+    elif source.startswith('\ufeff'):
+        source = source[1:]
+    return StringIO(source, newline=None).read()
 
 
 def is_ascii(string):
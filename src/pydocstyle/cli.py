@@ -1,14 +1,21 @@
 """Command line interface for pydocstyle."""
 import logging
+import os
+import sqlite3
 import sys
+import time
 
-from .checker import check
+from .cache import MemoryCache, ResultCache
 from .config import ConfigurationParser, IllegalConfiguration
-from .utils import log
-from .violations import Error
+from .parallel import check_files
+from .utils import TRACE, log
+from .vcs import get_changed_lines
 
 __all__ = ('main',)
 
+#: Number of seconds between checks for changed files with --watch.
+WATCH_INTERVAL = 0.5
+
 
 class ReturnCode:
     no_violations_found = 0
@@ -16,13 +23,22 @@ class ReturnCode:
     invalid_options = 2
 
 
-def run_pydocstyle():
-    log.setLevel(logging.DEBUG)
-    conf = ConfigurationParser()
+def run_pydocstyle(args=None, conf=None, results=None, memo=None):
+    """Run pydocstyle with the command line arguments `args`.
+
+    `args` default to `sys.argv[1:]`. Long-running processes, which run
+    pydocstyle over and over, pass the `ConfigurationParser` to reuse, the
+    dictionary of the results they keep in memory (see `MemoryCache`) and
+    the dictionary of checked definitions (see `check`).
+    Return the exit code of the run.
+
+    """
+    if conf is None:
+        conf = ConfigurationParser()
     setup_stream_handlers(conf.get_default_run_configuration())
 
     try:
-        conf.parse()
+        conf.parse(args)
     except IllegalConfiguration:
         return ReturnCode.invalid_options
 
@@ -33,37 +49,78 @@ def run_pydocstyle():
 
     log.debug("starting in debug mode.")
 
-    Error.explain = run_conf.explain
-    Error.source = run_conf.source
+    cache = None
+    if run_conf.cache_dir is not None:
+        try:
+            cache = ResultCache(
+                run_conf.cache_dir,
+                max_size=run_conf.cache_max_size,
+                explain=run_conf.explain,
+                source=run_conf.source,
+                parser=run_conf.parser,
+            )
+        except (OSError, sqlite3.Error) as error:
+            if run_conf.cache_stats or run_conf.cache_prune:
+                log.error('Cannot open cache: %s', error)
+                return ReturnCode.invalid_options
+            log.warning('Cannot open cache, checking without it: %s', error)
+    if cache is None and (results is not None or run_conf.watch):
+        # Keep the results in memory, also when the cache directory could not
+        # be opened, since watching relies on a cache.
+        cache = MemoryCache(
+            results,
+            explain=run_conf.explain,
+            source=run_conf.source,
+            parser=run_conf.parser,
+        )
+
+    if run_conf.cache_stats or run_conf.cache_prune:
+        try:
+            run_cache_command(cache, run_conf)
+        except sqlite3.Error as error:
+            log.error('Cannot use cache: %s', error)
+            return ReturnCode.invalid_options
+        return ReturnCode.no_violations_found
+
+    if results is not None and run_conf.files_from == '-':
+        log.error('The daemon cannot read the paths to check from stdin.')
+        return ReturnCode.invalid_options
+
+    if run_conf.watch:
+        if results is not None:
+            log.error('--watch cannot be used with the daemon.')
+            return ReturnCode.invalid_options
+        try:
+            return watch_files(conf, run_conf, cache, memo)
+        finally:
+            cache.close()
 
-    errors = []
+    count = 0
     try:
-        for (
-            filename,
-            checked_codes,
-            ignore_decorators,
-            property_decorators,
-            ignore_self_only_init,
-        ) in conf.get_files_to_check():
-            errors.extend(
-                check(
-                    (filename,),
-                    select=checked_codes,
-                    ignore_decorators=ignore_decorators,
-                    property_decorators=property_decorators,
-                    ignore_self_only_init=ignore_self_only_init,
-                )
-            )
+        changed_lines = None
+        if run_conf.diff is not None:
+            changed_lines = get_changed_lines(run_conf.diff)
+        files = conf.get_files_to_check(changed_lines)
+        for reports in check_files(
+            files, run_conf, cache, changed_lines, memo
+        ):
+            # Write the violations of every file as soon as it was checked,
+            # instead of keeping all of them until the end of the run.
+            for report in reports:
+                if report is not None:
+                    sys.stdout.write('%s\n' % report)
+            if reports:
+                sys.stdout.flush()
+            count += len(reports)
     except IllegalConfiguration as error:
-        # An illegal configuration file was found during file generation.
+        # An illegal configuration file was found during file generation, or
+        # the changed files could not be listed.
         log.error(error.args[0])
         return ReturnCode.invalid_options
+    finally:
+        if cache is not None:
+            cache.close()
 
-    count = 0
-    for error in errors:  # type: ignore
-        if hasattr(error, 'code'):
-            sys.stdout.write('%s\n' % error)
-        count += 1
     if count == 0:
         exit_code = ReturnCode.no_violations_found
     else:
@@ -73,6 +130,98 @@ def run_pydocstyle():
     return exit_code
 
 
+def watch_files(conf, run_conf, cache, memo=None):
+    """Check files whenever they or their configuration files change.
+
+    The files are polled every `WATCH_INTERVAL` seconds. Only files that are
+    new or changed since they were last checked, or whose check configuration
+    changed, are checked again and have their violations written. The
+    configurations of unchanged directories and the reports of unchanged
+    files are kept in `conf` and `cache`. Changed files are checked
+    incrementally: only the definitions that changed in them are checked
+    again.
+
+    Run until interrupted, or return `ReturnCode.invalid_options` if the
+    configuration of the first check is illegal.
+
+    """
+    # The files that could not be checked are not cached, so their stamps are
+    # kept to avoid logging the same failure over and over.
+    failed = {}
+    if memo is None:
+        memo = {}
+    last_error = None
+    first = True
+    while True:
+        try:
+            conf.forget_changed_configurations()
+            changed = []
+            for args in conf.get_files_to_check():
+                if cache.get(*args) is None:
+                    stamp = _get_stamp(args[0])
+                    if failed.get(args[0]) != stamp or stamp is None:
+                        changed.append(args)
+        except IllegalConfiguration as error:
+            if first:
+                log.error(error.args[0])
+                return ReturnCode.invalid_options
+            if error.args[0] != last_error:
+                log.error(error.args[0])
+                last_error = error.args[0]
+            time.sleep(WATCH_INTERVAL)
+            continue
+        last_error = None
+
+        if changed or first:
+            count = 0
+            for args, reports in zip(
+                changed, check_files(changed, run_conf, cache, memo=memo)
+            ):
+                if None in reports:
+                    failed[args[0]] = _get_stamp(args[0])
+                else:
+                    failed.pop(args[0], None)
+                for report in reports:
+                    if report is not None:
+                        sys.stdout.write('%s\n' % report)
+                count += len(reports)
+            print(
+                'Checked {} files, found {} violations. Watching for '
+                'changes...'.format(len(changed), count)
+            )
+            sys.stdout.flush()
+            first = False
+        time.sleep(WATCH_INTERVAL)
+
+
+def _get_stamp(filename):
+    """Return the modification time and size of a file, or None."""
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def run_cache_command(cache, run_conf):
+    """Print statistics about the cache or prune it."""
+    if run_conf.cache_prune:
+        removed = cache.prune()
+        print(f'Removed {removed} results from the cache.')
+    stats = cache.stats()
+    print(f"Cache: {stats['path']}")
+    print(f"Results: {stats['entries']} for {stats['files']} files")
+    print(
+        'Size: {:.1f} of {:.1f} MiB'.format(
+            stats['size'] / 2**20, stats['max_size'] / 2**20
+        )
+    )
+    if stats['entries']:
+        print(f"Oldest result used: {time.ctime(stats['oldest'])}")
+        print(f"Newest result used: {time.ctime(stats['newest'])}")
+    cache.close()
+
+
 def main():
     """Run pydocstyle as a script."""
     try:
@@ -82,23 +231,32 @@ def main():
 
 
 def setup_stream_handlers(conf):
-    """Set up logging stream handlers according to the options."""
+    """Set up logging stream handlers according to the options.
+
+    The level of the logger itself is set as well, so that messages below it
+    are dropped before they are formatted.
+
+    """
 
     class StdoutFilter(logging.Filter):
         def filter(self, record):
-            return record.levelno in (logging.DEBUG, logging.INFO)
+            return record.levelno < logging.WARNING
 
     log.handlers = []
 
-    stdout_handler = logging.StreamHandler(sys.stdout)
-    stdout_handler.setLevel(logging.WARNING)
-    stdout_handler.addFilter(StdoutFilter())
-    if conf.debug:
-        stdout_handler.setLevel(logging.DEBUG)
+    if conf.trace:
+        level = TRACE
+    elif conf.debug:
+        level = logging.DEBUG
     elif conf.verbose:
-        stdout_handler.setLevel(logging.INFO)
+        level = logging.INFO
     else:
-        stdout_handler.setLevel(logging.WARNING)
+        level = logging.WARNING
+    log.setLevel(level)
+
+    stdout_handler = logging.StreamHandler(sys.stdout)
+    stdout_handler.setLevel(level)
+    stdout_handler.addFilter(StdoutFilter())
     log.addHandler(stdout_handler)
 
     stderr_handler = logging.StreamHandler(sys.stderr)
@@ -1,6 +1,7 @@
 """Configuration file parsing and utilities."""
 
 import copy
+import fnmatch
 import itertools
 import operator
 import os
@@ -12,6 +13,8 @@ from functools import reduce
 from re import compile as re
 
 from ._version import __version__
+from .cache import ResultCache
+from .parser import PARSERS
 from .utils import log
 from .violations import ErrorRegistry, conventions
 
@@ -212,9 +215,31 @@ class ConfigurationParser:
 
     POSSIBLE_SECTION_NAMES = ('pydocstyle', 'pep257')
 
+    # Directories and files that are not walked into, besides `--exclude`,
+    # unless `--no-default-excludes` is given.
+    DEFAULT_EXCLUDE = (
+        '.git',
+        '.hg',
+        '.svn',
+        '.tox',
+        '.nox',
+        '.venv',
+        'venv',
+        '__pycache__',
+        'node_modules',
+        'build',
+        'dist',
+        'site-packages',
+        '*.egg-info',
+    )
+
     def __init__(self):
         """Create a configuration parser."""
         self._cache = {}
+        self._stamps = {}
+        self._listings = {}
+        self._config_files = {}
+        self._cache_key = None
         self._override_by_cli = None
         self._options = self._arguments = self._run_conf = None
         self._parser = self._create_option_parser()
@@ -226,20 +251,36 @@ class ConfigurationParser:
         options, _ = self._parse_args([])
         return self._create_run_config(options)
 
-    def parse(self):
+    def parse(self, args=None):
         """Parse the configuration.
 
         If one of `BASE_ERROR_SELECTION_OPTIONS` was selected, overrides all
         error codes to check and disregards any error code related
         configurations from the configuration files.
 
+        `args` are the command line arguments, `sys.argv[1:]` by default. The
+        parser may be used to parse the arguments of several runs: the
+        configurations that were already discovered are kept for a run with
+        the same options in the same directory, unless their configuration
+        files changed.
+
         """
-        self._options, self._arguments = self._parse_args()
-        self._arguments = self._arguments or ['.']
+        self._options, self._arguments = self._parse_args(args)
+        if not self._arguments and self._options.files_from is None:
+            self._arguments = ['.']
 
         if not self._validate_options(self._options):
             raise IllegalConfiguration()
 
+        cache_key = (os.getcwd(), dict(vars(self._options)))
+        if cache_key == self._cache_key:
+            self.forget_changed_configurations()
+        else:
+            self._cache.clear()
+            self._stamps.clear()
+            self._listings.clear()
+            self._cache_key = cache_key
+
         self._run_conf = self._create_run_config(self._options)
 
         config = self._create_check_config(self._options, use_defaults=False)
@@ -251,14 +292,24 @@ class ConfigurationParser:
         return self._run_conf
 
     @check_initialized
-    def get_files_to_check(self):
+    def get_files_to_check(self, changed_paths=None):
         """Generate files and error codes to check on each one.
 
-        Walk dir trees under `self._arguments` and yield file names
-        that `match` under each directory that `match_dir`.
+        Walk dir trees under the paths to check (see `_get_paths`) and yield
+        file names that `match` under each directory that `match_dir`.
         The method locates the configuration for each file name and yields a
         tuple of (filename, [error_codes]).
 
+        Directories are walked with `walk`, or with `walk_paths` over the
+        files that git lists with `--git-files`. These leave out the files
+        and directories that are excluded by `--exclude` and, unless
+        `--no-default-excludes` is given, `DEFAULT_EXCLUDE`. The paths to check are never excluded themselves.
+        A file that is linked from several walked places is yielded once.
+
+        If `changed_paths` is given, it is a collection of the real paths of
+        changed files, and only these files are yielded. Directories are not
+        walked - the changed files in them are matched as if they were.
+
         With every discovery of a new configuration file `IllegalConfiguration`
         might be raised.
 
@@ -284,9 +335,44 @@ class ConfigurationParser:
                 else None
             )
 
-        for name in self._arguments:
+        is_excluded = get_exclude_matcher(self._run_conf.exclude)
+        seen = set()
+
+        def _walk(name):
+            """Walk `name`, or only its changed files if there are any."""
+            if changed_paths is None:
+                if self._run_conf.git_files:
+                    from .vcs import list_files
+
+                    try:
+                        paths = list_files(name)
+                    except IllegalConfiguration as error:
+                        log.warning('%s; walking %s instead.', error, name)
+                    else:
+                        yield from walk_paths(name, paths, is_excluded)
+                        return
+                yield from walk(name, is_excluded)
+                return
+            real_name = os.path.realpath(name)
+            for path in sorted(changed_paths):
+                relative_path = os.path.relpath(path, real_name)
+                if relative_path.split(os.sep)[0] == os.pardir:
+                    continue
+                root = name
+                *dirs, filename = relative_path.split(os.sep)
+                for dir_name in dirs:
+                    config = self._get_config(os.path.abspath(root))
+                    _, match_dir = _get_matches(config)
+                    if not match_dir(dir_name) or is_excluded(root, dir_name):
+                        break
+                    root = os.path.join(root, dir_name)
+                else:
+                    if not is_excluded(root, filename):
+                        yield root, [], [filename], [None]
+
+        for name in self._get_paths():
             if os.path.isdir(name):
-                for root, dirs, filenames in os.walk(name):
+                for root, dirs, filenames, file_ids in _walk(name):
                     config = self._get_config(os.path.abspath(root))
                     match, match_dir = _get_matches(config)
                     ignore_decorators = _get_ignore_decorators(config)
@@ -295,18 +381,27 @@ class ConfigurationParser:
                     # Skip any dirs that do not match match_dir
                     dirs[:] = [d for d in dirs if match_dir(d)]
 
-                    for filename in map(os.path.basename, filenames):
-                        if match(filename):
-                            full_path = os.path.join(root, filename)
-                            yield (
-                                full_path,
-                                list(config.checked_codes),
-                                ignore_decorators,
-                                property_decorators,
-                                config.ignore_self_only_init,
-                            )
-            else:
-                config = self._get_config(os.path.abspath(name))
+                    for filename, file_id in zip(filenames, file_ids):
+                        if not match(filename) or file_id in seen:
+                            continue
+                        if file_id is not None:
+                            seen.add(file_id)
+                        full_path = os.path.join(root, filename)
+                        yield (
+                            full_path,
+                            list(config.checked_codes),
+                            ignore_decorators,
+                            property_decorators,
+                            config.ignore_self_only_init,
+                        )
+            elif (
+                changed_paths is None
+                or os.path.realpath(name) in changed_paths
+            ):
+                # The directory is known, which saves checking if it is one.
+                config = self._get_config(
+                    os.path.dirname(os.path.abspath(name))
+                )
                 match, _ = _get_matches(config)
                 ignore_decorators = _get_ignore_decorators(config)
                 property_decorators = _get_property_decorators(config)
@@ -321,8 +416,59 @@ class ConfigurationParser:
 
     # --------------------------- Private Methods -----------------------------
 
-    def _get_config_by_discovery(self, node):
-        """Get a configuration for checking `node` by config discovery.
+    def _get_paths(self):
+        """Generate the paths to check, which are given on the command line.
+
+        The arguments that start with '@', and the argument of
+        `--files-from`, are the paths of files that list paths to check, one
+        per line, and the paths in them are generated instead. The files are
+        read as the paths are generated, so that the paths are never all in
+        memory. `--files-from=-` reads the paths from the standard input.
+
+        """
+        for argument in self._arguments:
+            if argument.startswith('@'):
+                yield from read_paths(argument[1:])
+            else:
+                yield argument
+        if self._run_conf.files_from == '-':
+            yield from read_paths(None)
+        elif self._run_conf.files_from is not None:
+            yield from read_paths(self._run_conf.files_from)
+
+    def forget_changed_configurations(self):
+        """Forget the configurations whose configuration files changed.
+
+        The configuration of a directory is forgotten if a configuration file
+        was created, changed or deleted in it since the configuration was
+        cached, and so are the configurations of all directories below it,
+        which may inherit from it. Return the list of changed directories
+        (`None` stands for the file given by `--config`).
+
+        """
+        self._listings.clear()
+        changed = [
+            path
+            for path, stamp in self._stamps.items()
+            if self._get_config_stamp(path) != stamp
+        ]
+        for path in changed:
+            prefix = None if path is None else os.path.join(path, '')
+            for cached_path in list(self._cache):
+                if (
+                    prefix is None
+                    or cached_path is None
+                    or cached_path == path
+                    or cached_path.startswith(prefix)
+                ):
+                    del self._cache[cached_path]
+                    self._stamps.pop(cached_path, None)
+        if changed:
+            log.debug('configuration changed in %s.', changed)
+        return changed
+
+    def _get_config_by_discovery(self, path):
+        """Get a configuration for checking the directory `path` by discovery.
 
         Config discovery happens when no explicit config file is specified. The
         file system is searched for config files starting from the directory
@@ -332,12 +478,10 @@ class ConfigurationParser:
         See `_get_config` for further details.
 
         """
-        path = self._get_node_dir(node)
-
         if path in self._cache:
             return self._cache[path]
 
-        config_file = self._get_config_file_in_folder(path)
+        config_file = self._get_listed_config_file(path)
 
         if config_file is None:
             parent_dir, tail = os.path.split(path)
@@ -394,9 +538,11 @@ class ConfigurationParser:
         """
         if self._run_conf.config is None:
             log.debug('No config file specified, discovering.')
-            config = self._get_config_by_discovery(node)
+            path = self._get_node_dir(node)
+            config = self._get_config_by_discovery(path)
         else:
             log.debug('Using config file %r', self._run_conf.config)
+            path = None
             if not os.path.exists(self._run_conf.config):
                 raise IllegalConfiguration(
                     'Configuration file {!r} specified '
@@ -428,17 +574,100 @@ class ConfigurationParser:
         self._set_add_options(config.checked_codes, self._options)
 
         # Handle caching
-        if self._run_conf.config is not None:
-            self._cache[None] = config
-        else:
-            self._cache[self._get_node_dir(node)] = config
+        self._cache[path] = config
+        self._stamps[path] = self._get_config_stamp(path)
         return config
 
-    @staticmethod
-    def _get_node_dir(node):
+    def _get_config_stamp(self, path):
+        """Return the modification stamp of the configuration files in `path`.
+
+        The stamp is a tuple of the names, modification times and sizes of the
+        existing configuration files. If `path` is None, it is the stamp of
+        the file given by `--config`.
+
+        """
+        if path is not None:
+            return self._list_config_files(path)
+        try:
+            stat = os.stat(self._run_conf.config)
+        except OSError:
+            return ()
+        return ((self._run_conf.config, stat.st_mtime_ns, stat.st_size),)
+
+    def _list_config_files(self, path):
+        """Return the configuration files in the directory `path`.
+
+        The directory is listed once, and then again only after the
+        configurations were checked for changes. Return a tuple of (path,
+        modification time, size) tuples of the files in `path` that are named
+        in `PROJECT_CONFIG_FILES`, in the order of that tuple.
+
+        """
+        try:
+            listing = self._listings[path]
+        except KeyError:
+            pass
+        else:
+            return () if listing is None else listing
+        found = {}
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    name = os.path.normcase(entry.name)
+                    if name not in self.PROJECT_CONFIG_FILES:
+                        continue
+                    try:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            found[name] = (
+                                entry.path,
+                                stat.st_mtime_ns,
+                                stat.st_size,
+                            )
+                    except OSError:
+                        continue
+        except OSError:
+            # `None` tells `_get_node_dir` that `path` was not listed.
+            self._listings[path] = None
+            return ()
+        listing = tuple(
+            found[name] for name in self.PROJECT_CONFIG_FILES if name in found
+        )
+        self._listings[path] = listing
+        return listing
+
+    def _get_node_dir(self, node):
         """Return the absolute path of the directory of a filesystem node."""
         path = os.path.abspath(node)
-        return path if os.path.isdir(path) else os.path.dirname(path)
+        if self._listings.get(path) is not None or os.path.isdir(path):
+            return path
+        return os.path.dirname(path)
+
+    def _get_config_parser(self, path, stamp=None):
+        """Return the parser of the configuration file `path`, once read.
+
+        Every file is read once, and then again only when its modification
+        time and size, the `stamp`, change. The stamp is looked up if it is
+        not given. Return None if the file cannot be read.
+
+        """
+        if stamp is None:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return None
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = self._config_files.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        if path.endswith('.toml'):
+            parser = TomlParser()
+        else:
+            parser = RawConfigParser(inline_comment_prefixes=('#', ';'))
+        if not parser.read(path):
+            parser = None
+        self._config_files[path] = (stamp, parser)
+        return parser
 
     def _read_configuration_file(self, path):
         """Try to read and parse `path` as a configuration file.
@@ -449,14 +678,11 @@ class ConfigurationParser:
         Returns (options, should_inherit).
 
         """
-        if path.endswith('.toml'):
-            parser = TomlParser()
-        else:
-            parser = RawConfigParser(inline_comment_prefixes=('#', ';'))
+        parser = self._get_config_parser(path)
         options = None
         should_inherit = True
 
-        if parser.read(path) and self._get_section_name(parser):
+        if parser is not None and self._get_section_name(parser):
             all_options = self._parser.option_list[:]
             for group in self._parser.option_groups:
                 all_options.extend(group.option_list)
@@ -539,6 +765,23 @@ class ConfigurationParser:
         values = {
             opt: getattr(options, opt) for opt in RunConfiguration._fields
         }
+        if options.jobs is None:
+            values['jobs'] = 1
+        elif options.jobs == 'auto':
+            values['jobs'] = os.cpu_count() or 1
+        else:
+            values['jobs'] = int(options.jobs)
+        if options.cache_max_size is not None:
+            values['cache_max_size'] = options.cache_max_size * 2**20
+        values['exclude'] = ()
+        if not options.no_default_excludes:
+            values['exclude'] = ConfigurationParser.DEFAULT_EXCLUDE
+        if options.exclude:
+            values['exclude'] += tuple(
+                pattern.strip()
+                for pattern in options.exclude.split(',')
+                if pattern.strip()
+            )
         return RunConfiguration(**values)
 
     @classmethod
@@ -584,7 +827,9 @@ class ConfigurationParser:
     def _get_config_file_in_folder(cls, path):
         """Look for a configuration file in `path`.
 
-        If exists return its full path, otherwise None.
+        If exists return its full path, otherwise None. Every possible
+        configuration file is read: see `_get_listed_config_file` for the
+        cached lookup of a `ConfigurationParser`.
 
         """
         if os.path.isfile(path):
@@ -599,6 +844,20 @@ class ConfigurationParser:
             if config.read(full_path) and cls._get_section_name(config):
                 return full_path
 
+    def _get_listed_config_file(self, path):
+        """Look for a configuration file in the directory `path`.
+
+        This is `_get_config_file_in_folder`, with the directory listed and
+        the configuration files read once until they change. If exists return
+        its full path, otherwise None.
+
+        """
+        for full_path, *stamp in self._list_config_files(path):
+            parser = self._get_config_parser(full_path, tuple(stamp))
+            if parser is not None and self._get_section_name(parser):
+                return full_path
+        return None
+
     @classmethod
     def _get_exclusive_error_codes(cls, options):
         """Extract the error codes from the selected exclusive option."""
@@ -687,6 +946,50 @@ class ConfigurationParser:
                 )
             )
             return False
+
+        if (options.cache_stats or options.cache_prune) and (
+            options.cache_dir is None
+        ):
+            log.error('--cache-stats and --cache-prune require --cache-dir.')
+            return False
+
+        if options.watch and (
+            options.diff is not None
+            or options.cache_stats
+            or options.cache_prune
+        ):
+            log.error(
+                '--watch cannot be used with --diff, --cache-stats or '
+                '--cache-prune.'
+            )
+            return False
+
+        if options.watch and options.files_from == '-':
+            log.error('--watch cannot read the paths to check from stdin.')
+            return False
+
+        if options.cache_max_size is not None and options.cache_max_size < 1:
+            log.error(
+                "Illegal cache size '{}'. Use a positive number of "
+                "megabytes.".format(options.cache_max_size)
+            )
+            return False
+
+        if options.jobs is not None and options.jobs != 'auto':
+            if not options.jobs.isdigit() or int(options.jobs) < 1:
+                log.error(
+                    "Illegal number of jobs '{}'. Use a positive number or "
+                    "'auto'.".format(options.jobs)
+                )
+                return False
+
+        if options.parser not in PARSERS:
+            log.error(
+                "Illegal parser '{}'. Possible parsers: {}".format(
+                    options.parser, ', '.join(PARSERS)
+                )
+            )
+            return False
         return True
 
     @classmethod
@@ -770,6 +1073,13 @@ class ConfigurationParser:
             default=False,
             help='print debug information',
         )
+        option(
+            '--trace',
+            action='store_true',
+            default=False,
+            help='print debug information and trace the parsing of every '
+            'token',
+        )
         option(
             '-v',
             '--verbose',
@@ -789,6 +1099,99 @@ class ConfigurationParser:
             default=None,
             help='use given config file and disable config discovery',
         )
+        option(
+            '--git-files',
+            action='store_true',
+            default=False,
+            help='find the files in directories with git, which lists the '
+            'files that it tracks or does not ignore, instead of walking the '
+            'directories',
+        )
+        option(
+            '--files-from',
+            metavar='<path>',
+            default=None,
+            help='check the files and directories listed in <path>, one per '
+            'line, or in the standard input if <path> is -; arguments of the '
+            'form @<path> are read the same way',
+        )
+        option(
+            '--exclude',
+            metavar='<patterns>',
+            default=None,
+            help='skip files and directories whose names, or paths for '
+            'patterns with a slash, match any of the comma separated glob '
+            '<patterns> when walking directories; skipped by default are: '
+            '{}'.format(', '.join(ConfigurationParser.DEFAULT_EXCLUDE)),
+        )
+        option(
+            '--no-default-excludes',
+            action='store_true',
+            default=False,
+            help='do not skip the files and directories that are skipped by '
+            'default, only those that match --exclude',
+        )
+        option(
+            '-j',
+            '--jobs',
+            metavar='<n>',
+            default=None,
+            help='check files using <n> parallel processes (threads on '
+            'free-threaded Python), or one per CPU with --jobs=auto; default '
+            'is --jobs=1',
+        )
+        option(
+            '--diff',
+            metavar='<rev>',
+            default=None,
+            help='check only files that changed since the git revision '
+            '<rev>, and report only violations in definitions that '
+            'overlap the changed lines',
+        )
+        option(
+            '--watch',
+            action='store_true',
+            default=False,
+            help='keep running, and check files again whenever they or their '
+            'configuration files change',
+        )
+        option(
+            '--parser',
+            metavar='<name>',
+            default='token',
+            help='parse files with the given parser, which is either '
+            '"token" or "ast"; default is --parser=token',
+        )
+        option(
+            '--cache-dir',
+            metavar='<path>',
+            default=None,
+            help='cache the results of checked files in <path> and reuse '
+            'them for files that did not change',
+        )
+        option(
+            '--cache-max-size',
+            metavar='<MiB>',
+            type='int',
+            default=None,
+            help=(
+                'evict the least recently used results when the cache grows '
+                'beyond <MiB> megabytes; default is --cache-max-size={}'
+            ).format(ResultCache.DEFAULT_MAX_SIZE // 2**20),
+        )
+        option(
+            '--cache-stats',
+            action='store_true',
+            default=False,
+            help='print statistics about the cache in --cache-dir and exit',
+        )
+        option(
+            '--cache-prune',
+            action='store_true',
+            default=False,
+            help='remove results of deleted files and evict old results '
+            'from the cache in --cache-dir and exit',
+        )
 
         parser.add_option_group(
             OptionGroup(
@@ -945,5 +1348,195 @@ class IllegalConfiguration(Exception):
 # General configurations for pydocstyle run.
 RunConfiguration = namedtuple(
     'RunConfiguration',
-    ('explain', 'source', 'debug', 'verbose', 'count', 'config'),
+    (
+        'explain',
+        'source',
+        'debug',
+        'trace',
+        'verbose',
+        'count',
+        'config',
+        'jobs',
+        'diff',
+        'watch',
+        'parser',
+        'cache_dir',
+        'cache_max_size',
+        'cache_stats',
+        'cache_prune',
+        'exclude',
+        'no_default_excludes',
+        'files_from',
+        'git_files',
+    ),
 )
+
+
+def read_paths(path):
+    """Generate the paths that are listed in the file `path`, one per line.
+
+    The paths are read from the standard input if `path` is None. They are
+    decoded like the names of files, and blank lines are skipped.
+
+    Raise `IllegalConfiguration` if the file cannot be read.
+
+    """
+    if path is None:
+        yield from _read_lines(sys.stdin)
+        return
+    try:
+        with open(
+            path,
+            encoding=sys.getfilesystemencoding(),
+            errors=sys.getfilesystemencodeerrors(),
+        ) as lines:
+            yield from _read_lines(lines)
+    except OSError as error:
+        raise IllegalConfiguration(f'Cannot read the paths to check: {error}')
+
+
+def _read_lines(lines):
+    """Generate the lines of a file that are not blank, without newlines."""
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if line.strip():
+            yield line
+
+
+def get_exclude_matcher(patterns):
+    """Return a function that tells whether a file or directory is excluded.
+
+    `patterns` are glob patterns. Those that contain a path separator are
+    matched against absolute paths, relative to the current directory; the
+    others are matched against names. All patterns of each kind are compiled
+    into a single regular expression. Excluded entries are logged.
+
+    The function is called with the path of a directory and the name of an
+    entry in it.
+
+    """
+    name_patterns = []
+    path_patterns = []
+    for pattern in patterns:
+        if '/' in pattern or os.sep in pattern:
+            path_patterns.append(os.path.abspath(pattern))
+        else:
+            name_patterns.append(pattern)
+    match_name = _compile_globs(name_patterns)
+    match_path = _compile_globs(path_patterns)
+
+    def is_excluded(directory, name):
+        if (match_name is None or not match_name(name)) and (
+            match_path is None
+            or not match_path(os.path.join(os.path.abspath(directory), name))
+        ):
+            return False
+        log.debug("skipping excluded %s.", os.path.join(directory, name))
+        return True
+
+    return is_excluded
+
+
+def _compile_globs(patterns):
+    """Return the `match` function of a regex for `patterns`, if any."""
+    if not patterns:
+        return None
+    return re('|'.join(map(fnmatch.translate, patterns))).match
+
+
+def walk(top, is_excluded):
+    """Walk the directory tree under `top`, like `os.walk`.
+
+    Generate a (directory, subdirectories, filenames, file_ids) tuple for
+    every directory, top-down, in the same order as `os.walk`. The
+    directories that are removed from the list of subdirectories are not
+    walked. `file_ids` has the (device, inode) tuple of every file, or None
+    if it is unknown, so that files that are linked from several places can
+    be told apart.
+
+    Every directory is listed once with `os.scandir`, and the type and inode
+    of its entries are known from the listing. The entries for which
+    `is_excluded(directory, name)` is true are left out before descending,
+    and so are symbolic links to directories, which are not followed, so the
+    walk cannot loop.
+
+    """
+    stack = [(top, None)]
+    while stack:
+        directory, device = stack.pop()
+        try:
+            if device is None:
+                device = os.stat(directory).st_dev
+            with os.scandir(directory) as entries:
+                entries = list(entries)
+        except OSError:
+            continue
+        subdirectories = []
+        subdirectory_devices = {}
+        filenames = []
+        file_ids = []
+        for entry in entries:
+            if is_excluded(directory, entry.name):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(entry.name)
+                    subdirectory_devices[entry.name] = entry.stat(
+                        follow_symlinks=False
+                    ).st_dev
+                    continue
+                if entry.is_symlink():
+                    if entry.is_dir():
+                        continue
+                    stat = entry.stat()
+                    file_id = stat.st_dev, stat.st_ino
+                else:
+                    file_id = device, entry.inode()
+            except OSError:
+                # E.g. a broken symbolic link, which fails when it is checked.
+                file_id = None
+            filenames.append(entry.name)
+            file_ids.append(file_id)
+        yield directory, subdirectories, filenames, file_ids
+        stack.extend(
+            (os.path.join(directory, name), subdirectory_devices.get(name))
+            for name in reversed(subdirectories)
+        )
+
+
+def walk_paths(top, paths, is_excluded):
+    """Walk the directories of the files in `paths`, like `walk`.
+
+    `paths` are paths of files relative to `top`, with "/" separators. The
+    directories in them are walked top-down, without listing them, and the
+    same tuples as by `walk` are generated, except that the file ids are
+    None. The directories that are removed from the list of subdirectories
+    are not walked, and the entries for which `is_excluded(directory, name)`
+    is true are left out.
+
+    """
+    # Every directory is a tuple of its subdirectories and its files.
+    tree = {}, {}
+    for path in paths:
+        *names, filename = path.split('/')
+        subdirectories, filenames = tree
+        for name in names:
+            subdirectories, filenames = subdirectories.setdefault(
+                name, ({}, {})
+            )
+        filenames[filename] = None
+
+    stack = [(top, tree)]
+    while stack:
+        directory, (subtrees, filenames) = stack.pop()
+        subdirectories = [
+            name for name in subtrees if not is_excluded(directory, name)
+        ]
+        filenames = [
+            name for name in filenames if not is_excluded(directory, name)
+        ]
+        yield directory, subdirectories, filenames, [None] * len(filenames)
+        stack.extend(
+            (os.path.join(directory, name), subtrees[name])
+            for name in reversed(subdirectories)
+        )
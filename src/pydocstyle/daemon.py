@@ -0,0 +1,422 @@
+"""A daemon that keeps pydocstyle warm between runs.
+
+The daemon listens on a Unix socket and runs pydocstyle for its clients in
+a single long-running process. The imported checker, the discovered
+configurations and the reports of checked files are kept between runs, so
+a run only parses the files that changed since they were last checked.
+Configurations and reports are invalidated by the modification time of
+their files.
+
+The client sends the command line arguments and the working directory of
+a run and prints the output it gets back. It does not import the checker,
+so that it starts quickly:
+
+    pydocstyle-daemon start
+    pydocstyle-daemon check [<pydocstyle options>] [<paths>]
+    pydocstyle-daemon status
+    pydocstyle-daemon stop
+
+`check` starts the daemon if it is not running yet.
+
+"""
+
+import json
+import os
+import socket
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+from optparse import OptionParser
+
+__all__ = ('Server', 'main')
+
+USAGE = '''Usage: pydocstyle-daemon [options] <command> [<arguments>]
+
+Commands:
+    start       start the daemon in the background
+    serve       run the daemon in the foreground
+    check       check files with the daemon, starting it if necessary; the
+                arguments are those of pydocstyle
+    status      print the status of the daemon
+    stop        stop the daemon'''
+
+#: Number of seconds that `start` waits for the daemon to listen.
+START_TIMEOUT = 10
+
+#: Number of pending connections that are queued by the daemon.
+BACKLOG = 16
+
+#: Number of seconds that the daemon waits for a client to send a request or
+#: to receive a response, so that a client that hangs cannot block it.
+REQUEST_TIMEOUT = 10
+
+
+class DaemonError(Exception):
+    """Raised when the daemon cannot be reached or started."""
+
+
+class Server:
+    """The daemon, which runs pydocstyle for the clients of a Unix socket.
+
+    Requests are handled one at a time. The `ConfigurationParser`, the
+    in-memory results and the checked definitions are shared by all runs,
+    so changed files are checked incrementally.
+
+    """
+
+    def __init__(self, socket_path, timeout=None):
+        """Create a daemon for `socket_path`.
+
+        The daemon stops after `timeout` seconds without requests, if given.
+
+        """
+        from .cli import run_pydocstyle
+        from .config import ConfigurationParser
+
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.started = time.time()
+        self.runs = 0
+        self._run_pydocstyle = run_pydocstyle
+        self._conf = ConfigurationParser()
+        self._results = {}
+        self._memo = {}
+        self._running = False
+
+    def serve_forever(self):
+        """Listen on the socket and handle requests until stopped."""
+        if _is_running(self.socket_path):
+            raise DaemonError(
+                f'A daemon is already running on {self.socket_path}.'
+            )
+        if os.path.lexists(self.socket_path):
+            # The socket of a daemon that did not stop cleanly.
+            try:
+                os.remove(self.socket_path)
+            except OSError as error:
+                raise DaemonError(
+                    f'Cannot remove the old socket {self.socket_path}: {error}'
+                )
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Only the user may connect to the daemon.
+        umask = os.umask(0o177)
+        try:
+            listener.bind(self.socket_path)
+        finally:
+            os.umask(umask)
+        listener.listen(BACKLOG)
+        listener.settimeout(self.timeout)
+        self._running = True
+        try:
+            while self._running:
+                try:
+                    connection, _ = listener.accept()
+                except socket.timeout:
+                    break
+                with connection:
+                    self._handle(connection)
+        finally:
+            listener.close()
+            if self._running:
+                os.remove(self.socket_path)
+
+    def _handle(self, connection):
+        """Answer the request of a single connection."""
+        connection.settimeout(REQUEST_TIMEOUT)
+        try:
+            request = _receive(connection)
+        except (OSError, ValueError):
+            return
+        command = request.get('command') if isinstance(request, dict) else None
+        if command == 'check':
+            cwd, args = request.get('cwd'), request.get('args')
+            if isinstance(cwd, str) and _is_list_of_strings(args):
+                response = self._check(cwd, args)
+            else:
+                response = {'error': 'Invalid arguments of the check command.'}
+        elif command == 'status':
+            response = {
+                'pid': os.getpid(),
+                'uptime': time.time() - self.started,
+                'runs': self.runs,
+                'files': len(self._results),
+            }
+        elif command == 'stop':
+            # Remove the socket before answering, so that a new daemon can be
+            # started as soon as the client returns.
+            self._running = False
+            os.remove(self.socket_path)
+            response = {}
+        else:
+            response = {'error': f'Unknown command {command!r}.'}
+        try:
+            _send(connection, response)
+        except OSError:
+            pass
+
+    def _check(self, cwd, args):
+        """Run pydocstyle with `args` in `cwd` and return its output."""
+        from contextlib import redirect_stderr, redirect_stdout
+        from io import StringIO
+
+        self.runs += 1
+        out, err = StringIO(), StringIO()
+        with redirect_stdout(out), redirect_stderr(err):
+            try:
+                os.chdir(cwd)
+                code = self._run_pydocstyle(
+                    args, self._conf, self._results, self._memo
+                )
+            except SystemExit as error:
+                # Raised by the option parser, e.g. for --help.
+                code = error.code
+            except Exception as error:
+                print(f'ERROR: {error!r}', file=sys.stderr)
+                code = 2
+        if self.runs % 100 == 0:
+            from .cache import MemoryCache
+
+            MemoryCache(self._results).prune()
+            for path in [
+                path for path in self._memo if not os.path.exists(path)
+            ]:
+                del self._memo[path]
+        return {'out': out.getvalue(), 'err': err.getvalue(), 'code': code}
+
+
+def get_default_socket_path():
+    """Return the path of the socket used when none is given.
+
+    The socket is per user, in the runtime directory if there is one, or
+    else in a directory of the temporary directory that only the user can
+    access. That directory is created if it does not exist.
+
+    Raise `DaemonError` if the directory cannot be created, or if it is
+    accessible to other users.
+
+    """
+    uid = os.getuid()
+    directory = os.environ.get('XDG_RUNTIME_DIR')
+    if not directory:
+        directory = os.path.join(tempfile.gettempdir(), f'pydocstyle-{uid}')
+        _make_private_directory(directory)
+    return os.path.join(directory, f'pydocstyle-{uid}.sock')
+
+
+def _make_private_directory(path):
+    """Create the directory `path` that only the user can access.
+
+    Raise `DaemonError` if it cannot be created, or if it exists and is not
+    a directory that is owned by the user and closed to others.
+
+    """
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    except OSError as error:
+        raise DaemonError(f'Cannot create {path}: {error}')
+    status = os.lstat(path)
+    if (
+        not stat.S_ISDIR(status.st_mode)
+        or status.st_uid != os.getuid()
+        or status.st_mode & 0o077
+    ):
+        raise DaemonError(
+            f'{path} must be a directory that only the user can access.'
+        )
+
+
+def _check_owner(socket_path):
+    """Raise `DaemonError` if `socket_path` belongs to another user.
+
+    Otherwise another user could run a fake daemon, which would receive the
+    requests of the user and send back made up results.
+
+    """
+    try:
+        owner = os.lstat(socket_path).st_uid
+    except OSError:
+        # There is no daemon to connect to, which connecting tells.
+        return
+    if owner != os.getuid():
+        raise DaemonError(f'The socket {socket_path} belongs to another user.')
+
+
+def request(socket_path, command, **arguments):
+    """Send a request to the daemon on `socket_path` and return the response.
+
+    Raise `DaemonError` if the daemon is not running, if the socket belongs
+    to another user, or if the daemon fails to answer.
+
+    """
+    _check_owner(socket_path)
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            client.connect(socket_path)
+        except OSError as error:
+            raise DaemonError(
+                f'The daemon is not running on {socket_path}: {error}'
+            )
+        try:
+            _send(client, dict(arguments, command=command))
+            response = _receive(client)
+        except (OSError, ValueError) as error:
+            raise DaemonError(f'The daemon did not answer: {error}')
+    finally:
+        client.close()
+    if 'error' in response:
+        raise DaemonError(response['error'])
+    return response
+
+
+def start(socket_path, timeout=None):
+    """Start a daemon in the background and wait until it listens."""
+    command = [sys.executable, '-m', 'pydocstyle.daemon']
+    command.append(f'--socket={socket_path}')
+    if timeout is not None:
+        command.append(f'--timeout={timeout}')
+    command.append('serve')
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=stderr,
+            start_new_session=True,
+        )
+        deadline = time.time() + START_TIMEOUT
+        while not _is_running(socket_path):
+            if process.poll() is not None:
+                stderr.seek(0)
+                error = stderr.read().decode('utf-8', 'replace').strip()
+                raise DaemonError(f'The daemon failed to start: {error}')
+            if time.time() > deadline:
+                raise DaemonError('The daemon did not start in time.')
+            time.sleep(0.05)
+
+
+def _is_running(socket_path):
+    """Return whether a daemon is listening on `socket_path`.
+
+    Raise `DaemonError` if the socket belongs to another user.
+
+    """
+    _check_owner(socket_path)
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+    except OSError:
+        return False
+    finally:
+        client.close()
+    return True
+
+
+def _is_list_of_strings(value):
+    """Return whether `value`, decoded from JSON, is a list of strings."""
+    return isinstance(value, list) and all(
+        isinstance(item, str) for item in value
+    )
+
+
+def _send(connection, message):
+    """Send a message and signal its end by shutting down writing."""
+    connection.sendall(json.dumps(message).encode('utf-8'))
+    connection.shutdown(socket.SHUT_WR)
+
+
+def _receive(connection):
+    """Receive a message that ends when the peer shuts down writing."""
+    chunks = []
+    while True:
+        chunk = connection.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return json.loads(b''.join(chunks).decode('utf-8'))
+
+
+def _create_option_parser():
+    """Create the option parser of the daemon command line."""
+    parser = OptionParser(usage=USAGE)
+    parser.disable_interspersed_args()
+    parser.add_option(
+        '--socket',
+        metavar='<path>',
+        default=None,
+        help='the Unix socket of the daemon; default is a per user socket '
+        'in the runtime directory, or in a temporary directory that only the '
+        'user can access',
+    )
+    parser.add_option(
+        '--timeout',
+        metavar='<seconds>',
+        type=float,
+        default=None,
+        help='stop the daemon after <seconds> without requests',
+    )
+    return parser
+
+
+def run_daemon_command(args=None):
+    """Run a daemon command line and return the exit code."""
+    parser = _create_option_parser()
+    options, arguments = parser.parse_args(args)
+    if not arguments:
+        parser.error('A command is required.')
+    if not hasattr(socket, 'AF_UNIX'):
+        print('ERROR: The daemon requires Unix sockets.', file=sys.stderr)
+        return 2
+    command, arguments = arguments[0], arguments[1:]
+
+    try:
+        socket_path = options.socket or get_default_socket_path()
+        if command == 'serve':
+            Server(socket_path, options.timeout).serve_forever()
+        elif command == 'start':
+            if _is_running(socket_path):
+                print(f'The daemon is already running on {socket_path}.')
+            else:
+                start(socket_path, options.timeout)
+                print(f'Started the daemon on {socket_path}.')
+        elif command == 'check':
+            if not _is_running(socket_path):
+                start(socket_path, options.timeout)
+            response = request(
+                socket_path, 'check', cwd=os.getcwd(), args=arguments
+            )
+            sys.stdout.write(response['out'])
+            sys.stderr.write(response['err'])
+            return response['code']
+        elif command == 'status':
+            response = request(socket_path, 'status')
+            print(f'The daemon is running on {socket_path}.')
+            print(f"PID: {response['pid']}")
+            print(f"Uptime: {response['uptime']:.0f} seconds")
+            print(f"Runs: {response['runs']}")
+            print(f"Files with results: {response['files']}")
+        elif command == 'stop':
+            request(socket_path, 'stop')
+            print(f'Stopped the daemon on {socket_path}.')
+        else:
+            parser.error(f'Unknown command {command!r}.')
+    except DaemonError as error:
+        print(f'ERROR: {error}', file=sys.stderr)
+        return 2
+    return 0
+
+
+def main():
+    """Run the daemon command line as a script."""
+    try:
+        sys.exit(run_daemon_command())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
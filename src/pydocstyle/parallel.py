@@ -0,0 +1,400 @@
+"""Checking of multiple files in parallel worker processes or threads."""
+
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from collections import deque
+from functools import partial
+from itertools import chain, islice
+
+from .checker import check
+from .utils import log
+from .violations import Error
+
+__all__ = (
+    'check_file',
+    'check_files',
+    'imap_in_pool',
+    'threads_are_parallel',
+)
+
+#: Below this number of files a serial run is faster than starting workers.
+MIN_FILES_FOR_PARALLEL = 16
+
+#: Number of items sent to a worker in a single message by `imap_in_pool`.
+CHUNK_SIZE = 8
+
+#: Files are checked in about this many chunks per worker, so that workers
+#: that are done with a chunk get another one until the end of the run.
+CHUNKS_PER_JOB = 4
+
+#: Number of files that are looked up in the cache and scheduled together,
+#: so that the files to check are never all in memory.
+WINDOW_SIZE = 4096
+
+#: Estimated number of seconds it takes to check a byte of source code, for
+#: files whose cost is not known from an earlier run.
+SECONDS_PER_BYTE = 2e-6
+
+#: Number of chunks a worker checks before it is replaced by a fresh one.
+#: This keeps the memory of long-running workers bounded.
+MAX_TASKS_PER_CHILD = 100
+
+
+def check_file(
+    filename,
+    checked_codes,
+    ignore_decorators,
+    property_decorators,
+    ignore_self_only_init,
+    parser='token',
+    lines=None,
+    memo=None,
+    explain=None,
+    source=None,
+):
+    """Check a single file and return the report for each violation.
+
+    The first arguments are those generated by
+    `ConfigurationParser.get_files_to_check`, followed by the name of the
+    parser to use. Every violation is rendered to the text that should be
+    printed for it, with the `explain` and `source` options of
+    `Error.format`. Violations that are not `Error` instances (e.g., files
+    that could not be parsed) are represented by `None`: they are counted,
+    but were already logged.
+
+    If `lines` is given, it is a list of (first, last) tuples of changed
+    lines, and only violations in definitions that overlap them are
+    reported. `memo` is the dictionary of checked definitions that is passed
+    to `check`.
+
+    """
+    return [
+        error.format(explain, source) if isinstance(error, Error) else None
+        for error in check(
+            (filename,),
+            select=checked_codes,
+            ignore_decorators=ignore_decorators,
+            property_decorators=property_decorators,
+            ignore_self_only_init=ignore_self_only_init,
+            parser=parser,
+            memo=memo,
+        )
+        if lines is None
+        or not isinstance(error, Error)
+        or any(
+            first <= error.definition.end and error.definition.start <= last
+            for first, last in lines
+        )
+    ]
+
+
+def _check_file_args(args, parser, changed_lines, memo=None, **options):
+    lines = None
+    if changed_lines is not None:
+        lines = changed_lines.get(os.path.realpath(args[0]), [])
+    return check_file(*args, parser=parser, lines=lines, memo=memo, **options)
+
+
+def _init_worker(run_conf):
+    """Prepare a worker process to check files."""
+    from .cli import setup_stream_handlers
+
+    setup_stream_handlers(run_conf)
+
+
+def check_files(files, run_conf, cache=None, changed_lines=None, memo=None):
+    """Generate the reports of `check_file` for each of `files`.
+
+    `files` is an iterable of `check_file` arguments, as generated by
+    `ConfigurationParser.get_files_to_check`. The reports are generated in the
+    same order as `files`, no matter how many jobs are used.
+
+    When `run_conf.jobs` is larger than 1 and there are enough files to make
+    it worthwhile, the files are checked by a pool of worker processes, or of
+    threads if they run in parallel (see `imap_in_pool`). The files are
+    scheduled in windows of `WINDOW_SIZE` files, so that `files` is consumed
+    as they are checked.
+
+    If a `ResultCache` is given, files are looked up in it before they are
+    checked, and the reports of checked files are stored in it, along with
+    the time it took to check them.
+
+    If `changed_lines` is given, it maps the real paths of files to their
+    changed lines, as returned by `vcs.get_changed_lines`, and only the
+    violations in changed definitions are reported. The cache is not used
+    then, since it stores the reports of whole files.
+
+    If `memo` is given, the files that are checked in this process (rather
+    than in a pool) are checked incrementally: see `check`.
+
+    """
+    if changed_lines is not None:
+        cache = None
+    check_args = partial(
+        _check_file_args,
+        parser=run_conf.parser,
+        changed_lines=changed_lines,
+        explain=run_conf.explain,
+        source=run_conf.source,
+    )
+    check_args_here = partial(_check_timed, check_args=check_args, memo=memo)
+    files = iter(files)
+    head = []
+    if run_conf.jobs > 1:
+        head = list(islice(files, MIN_FILES_FOR_PARALLEL))
+    if len(head) < MIN_FILES_FOR_PARALLEL:
+        log.debug('checking files serially.')
+        for args in chain(head, files):
+            reports = None if cache is None else cache.get(*args)
+            if reports is None:
+                reports, cost = check_args_here(args)
+                if cache is not None:
+                    cache.put(reports, *args, cost=cost)
+            yield reports
+        return
+
+    files = chain(head, files)
+    while True:
+        window = list(islice(files, WINDOW_SIZE))
+        if not window:
+            break
+        yield from _check_window(
+            window, run_conf, cache, check_args, check_args_here
+        )
+
+
+def _check_window(files, run_conf, cache, check_args, check_args_here):
+    """Generate the reports of the list `files`, see `check_files`."""
+    # The cache may only be used from this thread, so all files are looked up
+    # before the ones that are missing are handed to the pool.
+    if cache is None:
+        cached = [None] * len(files)
+    else:
+        cached = [cache.get(*args) for args in files]
+    misses = [args for args, reports in zip(files, cached) if reports is None]
+    if len(misses) < MIN_FILES_FOR_PARALLEL:
+        results = map(check_args_here, misses)
+    else:
+        results = _check_in_pool(check_args, misses, run_conf, cache)
+    for args, reports in zip(files, cached):
+        if reports is None:
+            reports, cost = next(results)
+            if cache is not None:
+                cache.put(reports, *args, cost=cost)
+        yield reports
+    # Let the pool shut down.
+    for _ in results:
+        pass
+
+
+def _check_timed(args, check_args, memo=None):
+    """Return the reports of `check_args(args)` and the seconds it took."""
+    start = time.perf_counter()
+    reports = check_args(args, memo=memo)
+    return reports, time.perf_counter() - start
+
+
+def _check_chunk(chunk, check_args):
+    """Check a chunk of (index, args) tuples in a worker process.
+
+    Return a list of (index, reports, cost) tuples.
+
+    """
+    return [(index, *_check_timed(args, check_args)) for index, args in chunk]
+
+
+def _check_in_pool(check_args, files, run_conf, cache=None):
+    """Generate the reports of `files`, checked in a pool of processes.
+
+    `check_args` is called with the `check_file` arguments of each file.
+    The pool is one of threads if they run in parallel: see `imap_in_pool`.
+    (reports, cost) tuples are generated in the order of `files`, where
+    `cost` is the number of seconds it took to check the file.
+
+    To keep all the workers busy until the end, the most expensive files are
+    checked first (see `schedule_chunks`), and the results are put back in
+    order as they arrive.
+
+    """
+    log.debug(
+        'checking files with %d %s.',
+        run_conf.jobs,
+        'threads' if threads_are_parallel() else 'processes',
+    )
+    chunks = schedule_chunks(files, run_conf.jobs, cache)
+    results = {}
+    next_index = 0
+    for chunk_results in imap_in_pool(
+        partial(_check_chunk, check_args=check_args),
+        chunks,
+        run_conf.jobs,
+        _init_worker,
+        (run_conf,),
+        chunksize=1,
+        ordered=False,
+    ):
+        for index, reports, cost in chunk_results:
+            results[index] = reports, cost
+        while next_index in results:
+            yield results.pop(next_index)
+            next_index += 1
+
+
+def schedule_chunks(files, jobs, cache=None):
+    """Split `files` into chunks for `jobs` workers, most expensive first.
+
+    The cost of a file is the number of seconds it took to check it the last
+    time, if the cache knows it, or else estimated from its size. Expensive
+    files get a chunk of their own, while cheap files are batched into chunks
+    of about the same cost, to reduce the number of messages to the workers.
+    A chunk has at most its share of the number of files as well, so that
+    files whose cost is 0 (e.g. empty files) are spread over the workers.
+
+    Return a list of chunks, which are lists of (index, args) tuples, where
+    `index` is the position of `args` in `files`.
+
+    """
+    sizes = [_get_size(args[0]) for args in files]
+    costs = [
+        None if cache is None else cache.get_cost(args[0]) for args in files
+    ]
+    known = [
+        (size, cost)
+        for size, cost in zip(sizes, costs)
+        if cost is not None and size
+    ]
+    seconds_per_byte = SECONDS_PER_BYTE
+    if known:
+        seconds_per_byte = sum(cost for _, cost in known) / sum(
+            size for size, _ in known
+        )
+    costs = [
+        size * seconds_per_byte if cost is None else cost
+        for size, cost in zip(sizes, costs)
+    ]
+    order = sorted(range(len(files)), key=lambda index: -costs[index])
+    max_chunk_cost = sum(costs) / (jobs * CHUNKS_PER_JOB)
+    max_chunk_files = -(-len(files) // (jobs * CHUNKS_PER_JOB))
+
+    chunks = []
+    chunk = []
+    chunk_cost = 0.0
+    for index in order:
+        if chunk and (
+            chunk_cost + costs[index] > max_chunk_cost
+            or len(chunk) >= max_chunk_files
+        ):
+            chunks.append(chunk)
+            chunk = []
+            chunk_cost = 0.0
+        chunk.append((index, files[index]))
+        chunk_cost += costs[index]
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def _get_size(filename):
+    """Return the size of a file in bytes, or 0 if it cannot be accessed."""
+    try:
+        return os.path.getsize(filename)
+    except OSError:
+        return 0
+
+
+def threads_are_parallel():
+    """Return whether threads run Python code in parallel.
+
+    This is the case on free-threaded builds of CPython (3.13+) when the
+    global interpreter lock is disabled.
+
+    """
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def imap_in_pool(
+    function,
+    items,
+    jobs,
+    initializer=None,
+    initargs=(),
+    chunksize=CHUNK_SIZE,
+    ordered=True,
+    threads=None,
+):
+    """Generate `function(item)` for each of `items`, in a pool of processes.
+
+    The items are sent to the workers in chunks of `chunksize` items. The
+    results are generated in the order of `items` if `ordered`, or else as
+    soon as they are ready. Each of the `jobs` worker processes calls
+    `initializer(*initargs)` when it starts, if given. Interrupts are ignored
+    by the workers - the main process handles them and terminates the pool.
+
+    If `threads` is true, or if it is None and `threads_are_parallel`, the
+    items are given to a pool of `jobs` threads instead, which saves starting
+    processes and pickling the items and results. The threads share the
+    state of this process, so `initializer` and `chunksize` are not used.
+
+    """
+    if threads is None:
+        threads = threads_are_parallel()
+    if threads:
+        yield from _imap_in_threads(function, items, jobs, ordered)
+        return
+    pool = multiprocessing.Pool(
+        jobs,
+        _init_pool_worker,
+        (initializer, initargs),
+        maxtasksperchild=MAX_TASKS_PER_CHILD,
+    )
+    try:
+        imap = pool.imap if ordered else pool.imap_unordered
+        yield from imap(function, items, chunksize=chunksize)
+    except BaseException:
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+
+
+def _imap_in_threads(function, items, jobs, ordered):
+    """Generate `function(item)` for each of `items`, in a pool of threads.
+
+    At most twice as many items as threads are submitted at a time, so that
+    `items` is consumed as the results are.
+
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    items = iter(items)
+    pending = deque()
+    with ThreadPoolExecutor(jobs) as executor:
+        try:
+            while True:
+                for item in islice(items, 2 * jobs - len(pending)):
+                    pending.append(executor.submit(function, item))
+                if not pending:
+                    break
+                if ordered:
+                    yield pending.popleft().result()
+                    continue
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield future.result()
+        finally:
+            # Let the threads finish with the items that they already have.
+            for future in pending:
+                future.cancel()
+
+
+def _init_pool_worker(initializer, initargs):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if initializer is not None:
+        initializer(*initargs)
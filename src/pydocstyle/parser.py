@@ -1,18 +1,24 @@
 """Python code parser."""
 
+import ast
+import hashlib
 import sys
 import textwrap
 import tokenize as tk
+from bisect import bisect_left
+from collections import deque
+from copy import copy
 from io import StringIO
-from itertools import chain, dropwhile
+from itertools import accumulate, chain
 from pathlib import Path
 from re import compile as re
 from typing import Tuple
 
-from .utils import log
+from .utils import TRACE, cached_property, is_blank, log
 
 __all__ = (
     'Parser',
+    'AstParser',
     'Definition',
     'Module',
     'Package',
@@ -24,6 +30,7 @@ __all__ = (
     'AllError',
     'StringIO',
     'ParseError',
+    'PARSERS',
 )
 
 
@@ -50,7 +57,15 @@ def humanize(string):
 
 
 class Value:
-    """A generic object with a list of preset fields."""
+    """A generic object with a list of preset fields.
+
+    The fields are stored in slots rather than in an instance dictionary, so
+    every subclass declares `__slots__`, at least as an empty tuple.
+
+    """
+
+    __slots__ = ()
+    _fields = ()  # type: Tuple[str, ...]
 
     def __init__(self, *args):
         if len(self._fields) != len(args):
@@ -62,13 +77,17 @@ class Value:
                     self._fields,
                 )
             )
-        vars(self).update(zip(self._fields, args))
+        for field, value in zip(self._fields, args):
+            setattr(self, field, value)
+
+    def _values(self):
+        return tuple(getattr(self, field) for field in self._fields)
 
     def __hash__(self):
         return hash(repr(self))
 
     def __eq__(self, other):
-        return other and vars(self) == vars(other)
+        return isinstance(other, Value) and self._values() == other._values()
 
     def __repr__(self):
         kwargs = ', '.join(
@@ -78,10 +97,37 @@ class Value:
         return f'{self.__class__.__name__}({kwargs})'
 
 
+class Lines(list):
+    """The lines of a module, with the text they make up.
+
+    The definitions of a module share its lines. The offset of every line in
+    the text is computed once, so that the source of a definition is sliced
+    out of the text instead of being joined from its lines.
+
+    """
+
+    def __init__(self, lines):
+        """Create the index of `lines`, which keep their line endings."""
+        super().__init__(lines)
+        self.text = ''.join(self)
+        #: The offset of the start of every line in `text`, followed by the
+        #: length of `text`.
+        self.offsets = list(accumulate(chain([0], map(len, self))))
+
+    def offset(self, line, column=0):
+        """Return the offset in `text` of `column` of the 1-based `line`."""
+        return self.offsets[line - 1] + column
+
+
+def _is_empty_or_comment(line):
+    stripped = line.strip()
+    return not stripped or stripped.startswith('#')
+
+
 class Definition(Value):
     """A Python source code definition (could be class, function, etc)."""
 
-    _fields = (
+    __slots__ = _fields = (
         'name',
         '_source',
         'start',
@@ -98,12 +144,15 @@ class Definition(Value):
     kind = property(lambda self: self._human.split()[-1])
     module = property(lambda self: self.parent.module)
     dunder_all = property(lambda self: self.module.dunder_all)
-    _slice = property(lambda self: slice(self.start - 1, self.end))
     is_class = False
 
     def __iter__(self):
         return chain([self], *self.children)
 
+    def __hash__(self):
+        # Hashing every field would walk the whole tree of definitions.
+        return hash((type(self), self.name, self.start, self.end))
+
     @property
     def error_lineno(self):
         """Get the line number with which to report violations."""
@@ -115,16 +164,91 @@ class Definition(Value):
     def _publicity(self):
         return {True: 'public', False: 'private'}[self.is_public]
 
+    @property
+    def _source_end(self):
+        """Return the number of the last line of the source of the definition.
+
+        The blank and comment lines at the end of the definition are not part
+        of its source.
+
+        """
+        lines = self._source
+        end = min(self.end, len(lines))
+        while end >= self.start and _is_empty_or_comment(lines[end - 1]):
+            end -= 1
+        return end
+
     @property
     def source(self):
         """Return the source code for the definition."""
-        full_src = self._source[self._slice]
+        lines = self._source
+        return lines.text[
+            lines.offset(self.start) : lines.offset(self._source_end + 1)
+        ]
+
+    @property
+    def source_lines(self):
+        """Return the lines of the source code for the definition."""
+        return self._source[self.start - 1 : self._source_end]
+
+    @property
+    def docstring_indent(self):
+        """Return what precedes the docstring on the line where it starts."""
+        line = self._source[self.docstring.start - 1]
+        return line[: line.find(self.docstring.literal_lines[0])]
+
+    @property
+    def lines_before_docstring(self):
+        """Return the lines of the source before the line of the docstring."""
+        return self._source[self.start - 1 : self.docstring.start - 1]
+
+    @property
+    def lines_after_docstring(self):
+        """Return the rest of the source after the docstring, as lines.
 
-        def is_empty_or_comment(line):
-            return line.strip() == '' or line.strip().startswith('#')
+        The first line is the end of the line where the docstring ends.
 
-        filtered_src = dropwhile(is_empty_or_comment, reversed(full_src))
-        return ''.join(reversed(list(filtered_src)))
+        """
+        docstring = self.docstring
+        line = self._source[docstring.end - 1]
+        if docstring.start == docstring.end:
+            end = len(self.docstring_indent) + len(docstring)
+        else:
+            end = len(docstring.literal_lines[-1])
+        return [line[end:]] + self._source[docstring.end : self._source_end]
+
+    @property
+    def fingerprint(self):
+        """Return a hash of everything that the checks read from the definition.
+
+        This includes the definition's source, docstring, decorators and
+        publicity, which depends on its parents and on `__all__`. Unlike the
+        definition itself, the fingerprint does not depend on the position of
+        the definition in the file, so it does not change when lines are added
+        or removed before it.
+
+        """
+        values = [
+            type(self).__name__,
+            self.source,
+            self.is_public,
+            getattr(self, 'function_args', None),
+        ]
+        values.extend(
+            getattr(self, field)
+            for field in self._fields
+            if field not in self._POSITIONAL_FIELDS
+        )
+        digest = hashlib.blake2b(
+            repr(values).encode('utf-8', 'surrogatepass'), digest_size=16
+        )
+        return digest.digest()
+
+    #: Fields that are left out of the fingerprint: they are either positions
+    #: or other definitions.
+    _POSITIONAL_FIELDS = frozenset(
+        ('_source', 'start', 'end', 'children', 'parent')
+    )
 
     def __str__(self):
         out = f'in {self._publicity} {self._human} `{self.name}`'
@@ -150,6 +274,7 @@ class Module(Definition):
         'future_imports',
         'skipped_error_codes',
     )
+    __slots__ = ('_dunder_all', 'dunder_all_error', 'future_imports')
     _nest = staticmethod(lambda s: {'def': Function, 'class': Class}[s])
     module = property(lambda self: self)
     dunder_all = property(lambda self: self._dunder_all)
@@ -195,10 +320,13 @@ class Module(Definition):
 class Package(Module):
     """A package is a __init__.py module."""
 
+    __slots__ = ()
+
 
 class Function(Definition):
     """A Python source code function."""
 
+    __slots__ = ('function_args',)
     _nest = staticmethod(
         lambda s: {'def': NestedFunction, 'class': NestedClass}[s]
     )
@@ -236,6 +364,13 @@ class Function(Definition):
         """
         return self.name.startswith('test') or self.name == 'runTest'
 
+    def __init__(self, *args):
+        """Create a function whose parameters are not known yet."""
+        super().__init__(*args)
+        #: The names of the positional and keyword-only parameters, if they
+        #: are known by the parser. Otherwise, they are read from the source.
+        self.function_args = None
+
     @property
     def param_names(self):
         """Return the parameter names."""
@@ -245,12 +380,16 @@ class Function(Definition):
 class NestedFunction(Function):
     """A Python source code nested function."""
 
+    __slots__ = ()
+
     is_public = False
 
 
 class Method(Function):
     """A Python source code method."""
 
+    __slots__ = ()
+
     @property
     def is_magic(self):
         """Return True iff this method is a magic method (e.g., `__str__`)."""
@@ -292,6 +431,8 @@ class Method(Function):
 class Class(Definition):
     """A Python source code class."""
 
+    __slots__ = ()
+
     _nest = staticmethod(lambda s: {'def': Method, 'class': NestedClass}[s])
     is_public = Function.is_public
     is_class = True
@@ -300,6 +441,8 @@ class Class(Definition):
 class NestedClass(Class):
     """A Python source code nested class."""
 
+    __slots__ = ()
+
     @property
     def is_public(self):
         """Return True iff this class should be considered public."""
@@ -313,7 +456,7 @@ class NestedClass(Class):
 class Decorator(Value):
     """A decorator for function, method or class."""
 
-    _fields = 'name arguments'.split()
+    __slots__ = _fields = ('name', 'arguments')
 
 
 class Docstring(str):
@@ -322,8 +465,15 @@ class Docstring(str):
     This is a string, but has additional start/end attributes representing
     the start and end of the token.
 
+    The string is the literal, as it is in the source. Its decoded text and
+    the parts of it that the checks use are computed once, when they are
+    first used.
+
     """
 
+    # The prefix and the opening quotes of a string literal.
+    LITERAL_START_REGEX = re(r'([a-zA-Z]*)(\'\'\'|"""|\'|")')
+
     def __new__(cls, v, start, end):
         return str.__new__(cls, v)
 
@@ -331,6 +481,59 @@ class Docstring(str):
         self.start = start
         self.end = end
 
+    def __getnewargs__(self):
+        return str(self), self.start, self.end
+
+    @cached_property
+    def value(self):
+        """Return the text of the docstring, like `ast.literal_eval`.
+
+        The text is sliced out of the literal if it is a raw string, or if it
+        has no escape sequences. Other literals are evaluated.
+
+        """
+        match = self.LITERAL_START_REGEX.match(self)
+        prefix, quotes = match.groups()
+        text = self[match.end() : len(self) - len(quotes)]
+        if (
+            prefix.lower() in ('', 'u', 'r')
+            and '\r' not in text
+            and (prefix.lower() == 'r' or '\\' not in text)
+        ):
+            return text
+        return ast.literal_eval(self)
+
+    @cached_property
+    def lines(self):
+        """Return the lines of the text of the docstring."""
+        return tuple(self.value.split('\n'))
+
+    @cached_property
+    def literal_lines(self):
+        """Return the lines of the docstring literal."""
+        return tuple(self.split('\n'))
+
+    @cached_property
+    def stripped(self):
+        """Return the text of the docstring without surrounding whitespace."""
+        return self.value.strip()
+
+    @cached_property
+    def stripped_lines(self):
+        """Return the lines of the stripped text of the docstring."""
+        return tuple(self.stripped.split('\n'))
+
+    @property
+    def summary(self):
+        """Return the first line of the stripped text of the docstring."""
+        return self.stripped_lines[0]
+
+    @cached_property
+    def first_word(self):
+        """Return the first word of the docstring, or None if it is blank."""
+        words = self.stripped.split(None, 1)
+        return words[0] if words else None
+
 
 VARIADIC_MAGIC_METHODS = ('__init__', '__call__', '__new__')
 
@@ -365,6 +568,8 @@ class TokenStream:
 
     def __init__(self, filelike):
         self._generator = tk.generate_tokens(filelike.readline)
+        # Tokens that were read ahead by `skip_block` and given back.
+        self._pushed_back = deque()
         self.current = Token(*next(self._generator, None))
         self.line = self.current.start[0]
         self.log = log
@@ -384,12 +589,53 @@ class TokenStream:
         return previous
 
     def _next_from_generator(self):
+        if self._pushed_back:
+            return self._pushed_back.popleft()
         try:
             return next(self._generator, None)
         except (SyntaxError, tk.TokenError):
             self.log.warning('error generating tokens', exc_info=True)
             return None
 
+    def skip_block(self, limit=None):
+        """Skip the tokens of the current block, up to its closing DEDENT.
+
+        The tokens are skipped without being parsed, and the closing DEDENT
+        becomes the current token. If `limit` is given and the block reaches
+        line `limit`, nothing is skipped.
+
+        Return whether the block was skipped.
+
+        """
+        if self.current is None:
+            return False
+        kind, (line, _) = self.current.kind, self.current.start
+        read = []
+        depth = 0
+        while True:
+            if kind == tk.DEDENT:
+                if depth == 0:
+                    break
+                depth -= 1
+            elif limit is not None and line >= limit:
+                # The DEDENT that closes the block is on the line after the
+                # block, so it is not checked against the limit.
+                self._pushed_back.extendleft(reversed(read))
+                return False
+            elif kind == tk.INDENT:
+                depth += 1
+            token = self._next_from_generator()
+            if token is None:
+                self._pushed_back.extendleft(reversed(read))
+                return False
+            read.append(token)
+            kind, _, (line, _), _, _ = token
+        if read:
+            self.current = Token(*read[-1])
+            self.line = self.current.start[0]
+            self.got_logical_newline = True
+        return True
+
     def __iter__(self):
         while True:
             if self.current is not None:
@@ -400,16 +646,28 @@ class TokenStream:
 
 
 class TokenKind(int):
+    __slots__ = ()
+
     def __repr__(self):
         return "tk.{}".format(tk.tok_name[self])
 
 
+#: A single `TokenKind` for every token type, shared by all tokens.
+TOKEN_KINDS = {kind: TokenKind(kind) for kind in tk.tok_name}
+
+
 class Token(Value):
-    _fields = 'kind value start end source'.split()
+    __slots__ = _fields = ('kind', 'value', 'start', 'end', 'source')
 
-    def __init__(self, *args):
-        super().__init__(*args)
-        self.kind = TokenKind(self.kind)
+    def __init__(self, kind, value, start, end, source):
+        self.kind = TOKEN_KINDS[kind]
+        self.value = value
+        self.start = start
+        self.end = end
+        self.source = source
+
+    def __hash__(self):
+        return hash(self._values())
 
     def __str__(self):
         return f"{self.kind!r} ({self.value})"
@@ -418,15 +676,55 @@ class Token(Value):
 class Parser:
     """A Python source code parser."""
 
-    def parse(self, filelike, filename):
-        """Parse the given file-like object and return its Module object."""
+    # Whether to log the parsing of every token, see `utils.TRACE`.
+    trace = False
+
+    # Whether to parse the definitions that are nested in functions.
+    nested = True
+
+    # The number of levels of definitions that are parsed, or None for all.
+    depth = None
+
+    # A line that may start a definition.
+    DEFINITION_LINE_REGEX = re(r'\b(?:def|class)\b')
+
+    def parse(self, filelike, filename, nested=True, depth=None):
+        """Parse the given file-like object and return its Module object.
+
+        If `nested` is False, the definitions that are nested in functions
+        are left out, and the bodies of functions are not parsed.
+
+        If `depth` is given, only the definitions up to that depth are parsed:
+        0 for the module only, 1 for its top-level definitions, and so on.
+        The parser stops after the module docstring if `depth` is 0, so
+        `__all__` and the `__future__` imports are not parsed either.
+
+        The state of the parse is kept by a copy of the parser, so a parser
+        may parse several files at the same time, e.g. in several threads.
+
+        """
+        return copy(self)._parse(filelike, filename, nested, depth)
+
+    def _parse(self, filelike, filename, nested, depth):
+        """Parse a file with this parser, which is used for this file only."""
         self.log = log
-        self.source = filelike.readlines()
-        src = ''.join(self.source)
+        self.trace = log.isEnabledFor(TRACE)
+        self.nested = nested
+        self.depth = depth
+        self._level = 0
+        self.source = Lines(filelike.readlines())
+        src = self.source.text
         try:
             compile(src, filename, 'exec')
         except SyntaxError as error:
             raise ParseError() from error
+        # The bodies of functions that do not reach any of these lines do not
+        # contain definitions, so they are skipped instead of being parsed.
+        self._definition_lines = [
+            number
+            for number, line in enumerate(self.source, 1)
+            if self.DEFINITION_LINE_REGEX.search(line)
+        ]
         self.stream = TokenStream(StringIO(src))
         self.filename = filename
         self.dunder_all = None
@@ -465,14 +763,17 @@ class Parser:
 
     def parse_docstring(self):
         """Parse a single docstring and return its value."""
-        self.log.debug("parsing docstring, token is %s", self.current)
+        if self.trace:
+            self.log.log(TRACE, "parsing docstring, token is %s", self.current)
         while self.current.kind in (tk.COMMENT, tk.NEWLINE, tk.NL):
             self.stream.move()
-            self.log.debug(
-                "parsing docstring, token is %r (%s)",
-                self.current.kind,
-                self.current.value,
-            )
+            if self.trace:
+                self.log.log(
+                    TRACE,
+                    "parsing docstring, token is %r (%s)",
+                    self.current.kind,
+                    self.current.value,
+                )
         if self.current.kind == tk.STRING:
             docstring = Docstring(
                 self.current.value, self.current.start[0], self.current.end[0]
@@ -492,11 +793,13 @@ class Parser:
         at_arguments = False
 
         while self.current is not None:
-            self.log.debug(
-                "parsing decorators, current token is %r (%s)",
-                self.current.kind,
-                self.current.value,
-            )
+            if self.trace:
+                self.log.log(
+                    TRACE,
+                    "parsing decorators, current token is %r (%s)",
+                    self.current.kind,
+                    self.current.value,
+                )
             if self.current.kind == tk.NAME and self.current.value in [
                 'async',
                 'def',
@@ -537,12 +840,16 @@ class Parser:
     def parse_definitions(self, class_, dunder_all=False):
         """Parse multiple definitions and yield them."""
         while self.current is not None:
-            self.log.debug(
-                "parsing definition list, current token is %r (%s)",
-                self.current.kind,
-                self.current.value,
-            )
-            self.log.debug('got_newline: %s', self.stream.got_logical_newline)
+            if self.trace:
+                self.log.log(
+                    TRACE,
+                    "parsing definition list, current token is %r (%s)",
+                    self.current.kind,
+                    self.current.value,
+                )
+                self.log.log(
+                    TRACE, 'got_newline: %s', self.stream.got_logical_newline
+                )
             if dunder_all and self.current.value == '__all__':
                 self.parse_dunder_all()
             elif (
@@ -639,9 +946,13 @@ class Parser:
         start = self.line
         skipped_error_codes = self.parse_skip_comment()
         docstring = self.parse_docstring()
-        children = list(self.parse_definitions(Module, dunder_all=True))
-        assert self.current is None, self.current
-        end = self.line
+        if self.depth == 0:
+            children = []
+            end = len(self.source) + 1
+        else:
+            children = list(self.parse_definitions(Module, dunder_all=True))
+            assert self.current is None, self.current
+            end = self.line
         cls = Module
         if self.filename.endswith('__init__.py'):
             cls = Package
@@ -668,36 +979,7 @@ class Parser:
     def parse_definition(self, class_):
         """Parse a definition and return its value in a `class_` object."""
         start = self.line
-        self.consume(tk.NAME)
-        name = self.current.value
-        self.log.debug("parsing %s '%s'", class_.__name__, name)
-        self.stream.move()
-        callable_args = []
-        if self.current.kind == tk.OP and self.current.value == '(':
-            parenthesis_level = 0
-            in_default_arg = False
-            while True:
-                if self.current.kind == tk.OP:
-                    if self.current.value == '(':
-                        parenthesis_level += 1
-                    elif self.current.value == ')':
-                        parenthesis_level -= 1
-                        if parenthesis_level == 0:
-                            break
-                    elif self.current.value == ',':
-                        in_default_arg = False
-                elif (
-                    parenthesis_level == 1
-                    and self.current.kind == tk.NAME
-                    and not in_default_arg
-                ):
-                    callable_args.append(self.current.value)
-                    in_default_arg = True
-                self.stream.move()
-        if self.current.kind != tk.OP or self.current.value != ':':
-            self.leapfrog(tk.OP, value=":")
-        else:
-            self.consume(tk.OP)
+        name, callable_args = self.parse_definition_header(class_)
         if self.current.kind in (tk.NEWLINE, tk.COMMENT):
             skipped_error_codes = self.parse_skip_comment()
             self.leapfrog(tk.INDENT)
@@ -706,11 +988,17 @@ class Parser:
             decorators = self._accumulated_decorators
             self.log.debug("current accumulated decorators: %s", decorators)
             self._accumulated_decorators = []
-            self.log.debug("parsing nested definitions.")
-            children = list(self.parse_definitions(class_))
-            self.log.debug(
-                "finished parsing nested definitions for '%s'", name
-            )
+            self._level += 1
+            if self._skip_body(class_):
+                self.consume(tk.DEDENT)
+                children = []
+            else:
+                self.log.debug("parsing nested definitions.")
+                children = list(self.parse_definitions(class_))
+                self.log.debug(
+                    "finished parsing nested definitions for '%s'", name
+                )
+            self._level -= 1
             end = self.line - 1
         else:  # one-liner definition
             skipped_error_codes = ''
@@ -743,6 +1031,64 @@ class Parser:
         )
         return definition
 
+    def _skip_body(self, class_):
+        """Skip the rest of the body of a definition of type `class_`.
+
+        The body is skipped if its definitions are not parsed, because of
+        `depth` or `nested`, or if it is the body of a function that has no
+        definitions. Return whether the body was skipped.
+
+        """
+        if self.depth is not None and self._level >= self.depth:
+            return self.stream.skip_block()
+        if not issubclass(class_, Function):
+            return False
+        if not self.nested:
+            return self.stream.skip_block()
+        index = bisect_left(self._definition_lines, self.line)
+        if index < len(self._definition_lines):
+            return self.stream.skip_block(self._definition_lines[index])
+        return self.stream.skip_block()
+
+    def parse_definition_header(self, class_):
+        """Parse the header of a definition, up to and including the colon.
+
+        Return a tuple of the name of the definition and its callable
+        arguments.
+
+        """
+        self.consume(tk.NAME)
+        name = self.current.value
+        self.log.debug("parsing %s '%s'", class_.__name__, name)
+        self.stream.move()
+        callable_args = []
+        if self.current.kind == tk.OP and self.current.value == '(':
+            parenthesis_level = 0
+            in_default_arg = False
+            while True:
+                if self.current.kind == tk.OP:
+                    if self.current.value == '(':
+                        parenthesis_level += 1
+                    elif self.current.value == ')':
+                        parenthesis_level -= 1
+                        if parenthesis_level == 0:
+                            break
+                    elif self.current.value == ',':
+                        in_default_arg = False
+                elif (
+                    parenthesis_level == 1
+                    and self.current.kind == tk.NAME
+                    and not in_default_arg
+                ):
+                    callable_args.append(self.current.value)
+                    in_default_arg = True
+                self.stream.move()
+        if self.current.kind != tk.OP or self.current.value != ':':
+            self.leapfrog(tk.OP, value=":")
+        else:
+            self.consume(tk.OP)
+        return name, callable_args
+
     def parse_skip_comment(self):
         """Parse a definition comment for noqa skips."""
         skipped_error_codes = ''
@@ -755,11 +1101,13 @@ class Parser:
                 elif self.current.value.startswith('# noqa'):
                     skipped_error_codes = 'all'
             self.stream.move()
-            self.log.debug(
-                "parsing comments before docstring, token is %r (%s)",
-                self.current.kind,
-                self.current.value,
-            )
+            if self.trace:
+                self.log.log(
+                    TRACE,
+                    "parsing comments before docstring, token is %r (%s)",
+                    self.current.kind,
+                    self.current.value,
+                )
 
             if skipped_error_codes:
                 break
@@ -790,7 +1138,8 @@ class Parser:
         The purpose is to find __future__ statements.
 
         """
-        self.log.debug('parsing from/import statement.')
+        if self.trace:
+            self.log.log(TRACE, 'parsing from/import statement.')
         is_future_import = self._parse_from_import_source()
         self._parse_from_import_names(is_future_import)
 
@@ -829,28 +1178,314 @@ class Parser:
             if self.current.kind != tk.NAME:
                 self.stream.move()
                 continue
-            self.log.debug(
-                "parsing import, token is %r (%s)",
-                self.current.kind,
-                self.current.value,
-            )
+            if self.trace:
+                self.log.log(
+                    TRACE,
+                    "parsing import, token is %r (%s)",
+                    self.current.kind,
+                    self.current.value,
+                )
             if is_future_import:
                 self.log.debug('found future import: %s', self.current.value)
                 self.future_imports.add(self.current.value)
             self.consume(tk.NAME)
-            self.log.debug(
-                "parsing import, token is %r (%s)",
-                self.current.kind,
-                self.current.value,
-            )
+            if self.trace:
+                self.log.log(
+                    TRACE,
+                    "parsing import, token is %r (%s)",
+                    self.current.kind,
+                    self.current.value,
+                )
             if self.current.kind == tk.NAME and self.current.value == 'as':
                 self.consume(tk.NAME)  # as
                 if self.current.kind == tk.NAME:
                     self.consume(tk.NAME)  # new name, irrelevant
             if self.current.value == ',':
                 self.consume(tk.OP)
-            self.log.debug(
-                "parsing import, token is %r (%s)",
-                self.current.kind,
-                self.current.value,
-            )
+            if self.trace:
+                self.log.log(
+                    TRACE,
+                    "parsing import, token is %r (%s)",
+                    self.current.kind,
+                    self.current.value,
+                )
+
+
+class AstParser(Parser):
+    """A Python source code parser that is based on the `ast` module.
+
+    The source is parsed once with `ast` and the definitions are built from
+    the syntax tree, instead of from the tokens of the whole file. Only small
+    parts of the source, like the headers of definitions and the statements
+    that use `__all__`, are tokenized. They are parsed like `Parser` does, so
+    both parsers build the same definitions.
+
+    Unlike `Parser`, the source is not compiled. Errors that are only found
+    by the compiler, such as a `return` outside of a function, are therefore
+    not reported.
+
+    """
+
+    # The start of a string literal, including its prefix.
+    STRING_START = re(r'[a-zA-Z]{0,2}[\'"]')
+
+    DEFINITION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+    # Nodes whose blocks may contain definitions.
+    BLOCK_NODES = tuple(
+        getattr(ast, name)
+        for name in ('stmt', 'excepthandler', 'match_case')
+        if hasattr(ast, name)
+    )
+
+    def _parse(self, filelike, filename, nested, depth):
+        """Parse a file with this parser, which is used for this file only."""
+        self.log = log
+        self.trace = log.isEnabledFor(TRACE)
+        self.nested = nested
+        self.depth = depth
+        self._level = 0
+        self.source = Lines(filelike.readlines())
+        src = self.source.text
+        try:
+            tree = ast.parse(src, filename)
+        except SyntaxError as error:
+            raise ParseError() from error
+        self.filename = filename
+        self.dunder_all = None
+        self.dunder_all_error = None
+        self.future_imports = set()
+        self._accumulated_decorators = []
+        return self.parse_module_node(tree, '__all__' in src)
+
+    def parse_module_node(self, node, has_dunder_all=True):
+        """Return the Module object of the syntax tree of a module."""
+        self.log.debug("parsing module.")
+        if node.body:
+            first_line = self._get_first_line(node.body[0])
+            docstring = self._get_docstring(node.body[0])
+        else:
+            first_line = len(self.source) + 1
+            docstring = None
+        skipped_error_codes = self._get_skip_comment(1, first_line)
+        # The statements are not parsed if only the module is.
+        statements = [] if self.depth == 0 else node.body
+        for statement in statements:
+            if (
+                isinstance(statement, ast.ImportFrom)
+                and statement.module == '__future__'
+                and not statement.level
+            ):
+                self.future_imports.update(
+                    alias.name for alias in statement.names
+                )
+        if has_dunder_all:
+            self._parse_dunder_all_statements(statements)
+        children = list(self._parse_definition_nodes(statements, Module))
+        cls = Module
+        if self.filename.endswith('__init__.py'):
+            cls = Package
+        module = cls(
+            self.filename,
+            self.source,
+            1,
+            len(self.source) + 1,
+            [],
+            docstring,
+            children,
+            None,
+            self.dunder_all,
+            self.dunder_all_error,
+            None,
+            skipped_error_codes,
+        )
+        for child in module.children:
+            child.parent = module
+        module.future_imports = self.future_imports
+        self.log.debug("finished parsing module.")
+        return module
+
+    def parse_definition_node(self, node, class_):
+        """Return the `class_` object of a definition in the syntax tree."""
+        body = node.body[0]
+        body_line = self._get_first_line(body)
+        if isinstance(body, self.DEFINITION_NODES) and body.decorator_list:
+            line = self.source[body_line - 1]
+            body_column = len(line) - len(line.lstrip())
+        else:
+            body_column = self._get_column(body.lineno, body.col_offset)
+        # Tokenize the decorators and the header of the definition, up to
+        # the first statement of its body.
+        header = self.source[self._get_first_line(node) - 1 : body_line]
+        header[-1] = header[-1][:body_column]
+        is_one_liner = not is_blank(header[-1])
+        self.stream = TokenStream(StringIO(''.join(header)))
+        self._accumulated_decorators = []
+        if self.current.kind == tk.INDENT:
+            self.stream.move()
+        if self.current.value == '@':
+            self.consume(tk.OP)
+            self.parse_decorators()
+        if self.current.value == 'async':
+            self.stream.move()
+        name, callable_args = self.parse_definition_header(class_)
+        decorators = self._accumulated_decorators
+        self._accumulated_decorators = []
+        docstring = self._get_docstring(body)
+        if is_one_liner:
+            skipped_error_codes = ''
+            children = []
+            end = body_line if docstring is None else docstring.end
+        else:
+            skipped_error_codes = self.parse_skip_comment()
+            self._level += 1
+            if (self.depth is None or self._level < self.depth) and (
+                self.nested or not issubclass(class_, Function)
+            ):
+                self.log.debug("parsing nested definitions.")
+                children = list(
+                    self._parse_definition_nodes(node.body, class_)
+                )
+                self.log.debug(
+                    "finished parsing nested definitions for '%s'", name
+                )
+            else:
+                children = []
+            self._level -= 1
+            end = self._get_next_code_line(node.end_lineno) - 1
+        definition = class_(
+            name,
+            self.source,
+            node.lineno,
+            end,
+            decorators,
+            docstring,
+            children,
+            callable_args,
+            None,  # parent
+            skipped_error_codes,
+        )
+        if issubclass(class_, Function):
+            arguments = node.args
+            definition.function_args = [
+                arg.arg for arg in chain(arguments.args, arguments.kwonlyargs)
+            ]
+        for child in definition.children:
+            child.parent = definition
+        self.log.debug("finished parsing %s '%s'.", class_.__name__, name)
+        return definition
+
+    def _parse_definition_nodes(self, statements, class_):
+        """Generate the definitions in `statements` and their blocks.
+
+        Definitions nested in other definitions are not generated - they are
+        the children of their parent definition.
+
+        """
+        for statement in statements:
+            if isinstance(statement, self.DEFINITION_NODES):
+                kind = (
+                    'class' if isinstance(statement, ast.ClassDef) else 'def'
+                )
+                yield self.parse_definition_node(statement, class_._nest(kind))
+            elif isinstance(statement, self.BLOCK_NODES):
+                for field in statement._fields:
+                    value = getattr(statement, field)
+                    if isinstance(value, list):
+                        yield from self._parse_definition_nodes(value, class_)
+
+    def _parse_dunder_all_statements(self, statements):
+        """Parse the module level statements that use `__all__`."""
+        last_line = 0
+        for statement in statements:
+            if isinstance(statement, self.DEFINITION_NODES):
+                continue
+            if statement.lineno <= last_line:
+                # The statement is on a line that was already parsed.
+                continue
+            lines = self.source[statement.lineno - 1 : statement.end_lineno]
+            last_line = statement.end_lineno
+            if not any('__all__' in line for line in lines):
+                continue
+            self.stream = TokenStream(StringIO(''.join(lines)))
+            depth = 0
+            while self.current is not None:
+                if self.current.kind == tk.INDENT:
+                    depth += 1
+                elif self.current.kind == tk.DEDENT:
+                    depth -= 1
+                elif depth == 0 and self.current.value == '__all__':
+                    self.parse_dunder_all()
+                    continue
+                elif depth == 0 and self.current.value == 'from':
+                    self.parse_from_import_statement()
+                    continue
+                self.stream.move()
+
+    def _get_docstring(self, statement):
+        """Return the docstring at the start of `statement`, if any.
+
+        Like `Parser`, the docstring is the first token of the statement if
+        it is a string.
+
+        """
+        if self._get_first_line(statement) != statement.lineno:
+            # The statement starts with a decorator.
+            return None
+        line = self.source[statement.lineno - 1]
+        column = self._get_column(statement.lineno, statement.col_offset)
+        if not self.STRING_START.match(line, column):
+            return None
+        lines = self.source[statement.lineno : statement.end_lineno]
+        readline = StringIO(''.join([line[column:]] + lines)).readline
+        token = next(tk.generate_tokens(readline))
+        if token.type != tk.STRING:
+            return None
+        return Docstring(
+            token.string,
+            statement.lineno,
+            statement.lineno + token.end[0] - 1,
+        )
+
+    def _get_skip_comment(self, start, end):
+        """Parse the noqa comments in the lines between `start` and `end`."""
+        lines = self.source[start - 1 : end - 1]
+        if not any('noqa' in line for line in lines):
+            return ''
+        self.stream = TokenStream(StringIO(''.join(lines)))
+        return self.parse_skip_comment()
+
+    def _get_next_code_line(self, line):
+        """Return the number of the first line after `line` with code.
+
+        Blank lines and lines with only comments are skipped. If there are
+        no more lines with code, the line after the last line is returned.
+
+        """
+        for number in range(line, len(self.source)):
+            text = self.source[number].strip()
+            if text and not text.startswith('#'):
+                return number + 1
+        return len(self.source) + 1
+
+    def _get_column(self, line, col_offset):
+        """Convert the UTF-8 byte offset of the `ast` to a string index."""
+        text = self.source[line - 1]
+        if text.isascii():
+            return col_offset
+        return len(text.encode('utf-8')[:col_offset].decode('utf-8'))
+
+    @staticmethod
+    def _get_first_line(statement):
+        """Return the first line of a statement, including its decorators."""
+        decorators = getattr(statement, 'decorator_list', None)
+        if decorators:
+            return decorators[0].lineno
+        return statement.lineno
+
+
+#: The available parsers, by name.
+PARSERS = {'token': Parser}
+if sys.version_info >= (3, 8):
+    # The `ast` parser relies on the end positions of the nodes.
+    PARSERS['ast'] = AstParser
@@ -7,6 +7,11 @@ from typing import Any, Iterable, Tuple
 # Do not update the version manually - it is managed by `bumpversion`.
 log = logging.getLogger(__name__)
 
+#: Log level of the messages that trace the parsing of every token. They are
+#: only built when this level is enabled, with the --trace option.
+TRACE = 5
+logging.addLevelName(TRACE, 'TRACE')
+
 #: Regular expression for stripping non-alphanumeric characters
 NON_ALPHANUMERIC_STRIP_RE = re.compile(r'[\W_]+')
 
@@ -45,3 +50,25 @@ def common_prefix_length(a: str, b: str) -> int:
 def strip_non_alphanumeric(string: str) -> str:
     """Strip string from any non-alphanumeric characters."""
     return NON_ALPHANUMERIC_STRIP_RE.sub('', string)
+
+
+class cached_property:
+    """A property whose value is computed once per instance.
+
+    This is `functools.cached_property`, which is not available before
+    Python 3.8. The value is stored in the instance dictionary, which takes
+    precedence over the property on the following lookups.
+
+    """
+
+    def __init__(self, function):
+        """Create the property of the value that `function` computes."""
+        self.function = function
+        self.__doc__ = function.__doc__
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = self.function(instance)
+        instance.__dict__[self.function.__name__] = value
+        return value
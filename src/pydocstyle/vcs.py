@@ -0,0 +1,147 @@
+"""Version control integration, based on the local `git` executable."""
+
+import os
+import subprocess
+from re import compile as re
+
+from .config import IllegalConfiguration
+from .utils import log
+
+__all__ = ('get_changed_lines', 'list_files')
+
+# The header of a hunk in a unified diff, e.g. "@@ -10,2 +10,3 @@ def foo():".
+HUNK_HEADER_REGEX = re(r'@@ -\d+(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+# The first characters of the lines in a hunk: context, deleted and added
+# lines, and the "\\ No newline at end of file" marker.
+HUNK_LINE_PREFIXES = (' ', '-', '+', '\\')
+
+
+def get_changed_lines(rev):
+    """Return the lines that changed since the git revision `rev`.
+
+    The changes of the working tree of the repository in the current
+    directory are compared to `rev`. Return a dictionary that maps the real
+    path of every changed file to a list of (first, last) tuples of changed
+    line numbers. Deleted lines are represented by the lines around them.
+    Deleted files are left out.
+
+    Raise `IllegalConfiguration` if git cannot be run or fails.
+
+    """
+    root = _run_git('rev-parse', '--show-toplevel').rstrip('\n')
+    output = _run_git(
+        'diff',
+        '--no-color',
+        '--no-ext-diff',
+        '--unified=0',
+        '--diff-filter=d',
+        # The paths are parsed relative to the root, with the default
+        # prefixes, whatever the configuration of the repository says.
+        '--src-prefix=a/',
+        '--dst-prefix=b/',
+        '--no-relative',
+        rev,
+        '--',
+    )
+    changed_lines = {
+        os.path.realpath(os.path.join(root, path)): lines
+        for path, lines in parse_diff(output).items()
+    }
+    log.debug('found %d files that changed since %s.', len(changed_lines), rev)
+    return changed_lines
+
+
+def list_files(directory):
+    """Return the files in `directory` that are in git, or not ignored by it.
+
+    These are the files that git tracks, except those that were deleted,
+    and the untracked files that are not ignored by `.gitignore` or other
+    exclude files. Return their paths relative to `directory`, with "/"
+    separators, in the order of git.
+
+    Raise `IllegalConfiguration` if git cannot be run or fails, e.g. if
+    `directory` is not in a git repository.
+
+    """
+    args = ('ls-files', '-z', '--cached', '--others', '--exclude-standard')
+    paths = _run_git(*args, cwd=directory).split('\0')
+    deleted = _run_git('ls-files', '-z', '--deleted', cwd=directory)
+    deleted = set(deleted.split('\0'))
+    # Unmerged files are listed once per stage. The output ends with a "\0",
+    # which leaves an empty path, and the deleted paths do too.
+    files = [path for path in dict.fromkeys(paths) if path not in deleted]
+    log.debug('git lists %d files in %s.', len(files), directory)
+    return files
+
+
+def parse_diff(output):
+    """Parse the output of `git diff --unified=0`.
+
+    Return a dictionary that maps every file path, relative to the root of
+    the repository, to a list of (first, last) tuples of changed lines.
+
+    """
+    changed_lines = {}
+    lines = None
+    # The numbers of old and new lines left in the current hunk. The lines of
+    # a hunk are not headers, even if they look like them.
+    old_left = new_left = 0
+    for line in output.splitlines():
+        if (old_left > 0 or new_left > 0) and line[:1] in HUNK_LINE_PREFIXES:
+            if line[0] in ' -':
+                old_left -= 1
+            if line[0] in ' +':
+                new_left -= 1
+            continue
+        old_left = new_left = 0
+        if line.startswith('+++ '):
+            path = line[4:]
+            if path.startswith('"'):
+                path = _unquote(path)
+            if path == '/dev/null':
+                lines = None
+            else:
+                # Remove the "b/" prefix of the new file.
+                lines = changed_lines.setdefault(path[2:], [])
+        elif line.startswith('@@ '):
+            match = HUNK_HEADER_REGEX.match(line)
+            if match is None:
+                continue
+            old_left, start, new_left = (
+                1 if count is None else int(count) for count in match.groups()
+            )
+            if lines is None:
+                continue
+            if new_left == 0:
+                # Lines were only deleted, right after line `start`.
+                lines.append((max(start, 1), start + 1))
+            else:
+                lines.append((start, start + new_left - 1))
+    return changed_lines
+
+
+def _unquote(path):
+    """Unquote a path that git quoted with C-style escapes."""
+    escaped = path[1:-1].encode('utf-8', 'surrogateescape')
+    raw = escaped.decode('unicode_escape').encode('latin-1')
+    return raw.decode('utf-8', 'surrogateescape')
+
+
+def _run_git(*args, cwd=None):
+    """Run the git command `args` in `cwd` and return its output."""
+    try:
+        process = subprocess.run(
+            ('git', '-c', 'core.quotePath=false') + args,
+            cwd=cwd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            encoding='utf-8',
+            errors='surrogateescape',
+        )
+    except OSError as error:
+        raise IllegalConfiguration(f'Cannot run git: {error}')
+    if process.returncode != 0:
+        raise IllegalConfiguration(
+            f'git {args[0]} failed: {process.stderr.strip()}'
+        )
+    return process.stdout
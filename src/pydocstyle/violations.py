@@ -17,7 +17,7 @@ ErrorParams = namedtuple('ErrorParams', ['code', 'short_desc', 'context'])
 class Error:
     """Error in docstring style."""
 
-    # Options that define how errors are printed:
+    # Options that define how errors are printed by default, see `format`:
     explain = False
     source = False
 
@@ -63,7 +63,7 @@ class Error:
         if self.definition is None:
             return ''
         source = ''
-        lines = self.definition.source.splitlines(keepends=True)
+        lines = self.definition.source_lines
         offset = self.definition.start  # type: ignore
         lines_stripped = list(
             reversed(list(dropwhile(is_blank, reversed(lines))))
@@ -79,32 +79,45 @@ class Error:
                 break
         return source
 
-    def __str__(self) -> str:
-        if self.explanation:
-            self.explanation = '\n'.join(
-                l for l in self.explanation.split('\n') if not is_blank(l)
+    def format(
+        self, explain: Optional[bool] = None, source: Optional[bool] = None
+    ) -> str:
+        """Return the report of the error, as it is printed.
+
+        The report includes the explanation of the error if `explain` is
+        True, and the source code of its definition if `source` is True.
+        They default to the `explain` and `source` attributes, so that
+        concurrent runs can print errors with different options.
+
+        """
+        if explain is None:
+            explain = self.explain
+        if source is None:
+            source = self.source
+        explanation = self.explanation
+        if explanation:
+            explanation = '\n'.join(
+                l for l in explanation.split('\n') if not is_blank(l)
             )
         template = '{filename}:{line} {definition}:\n        {message}'
-        if self.source and self.explain:
+        if source and explain:
             template += '\n\n{explanation}\n\n{lines}\n'
-        elif self.source and not self.explain:
+        elif source and not explain:
             template += '\n\n{lines}\n'
-        elif self.explain and not self.source:
+        elif explain and not source:
             template += '\n\n{explanation}\n\n'
         return template.format(
-            **{
-                name: getattr(self, name)
-                for name in [
-                    'filename',
-                    'line',
-                    'definition',
-                    'message',
-                    'explanation',
-                    'lines',
-                ]
-            }
+            filename=self.filename,
+            line=self.line,
+            definition=self.definition,
+            message=self.message,
+            explanation=explanation,
+            lines=self.lines if source else '',
         )
 
+    def __str__(self) -> str:
+        return self.format()
+
     def __repr__(self) -> str:
         return str(self)
 
@@ -6,6 +6,7 @@ therefore we load them at import time, rather than on-demand.
 """
 import pkgutil
 import re
+import threading
 from typing import Dict, Iterator, Set
 
 import snowballstemmer
@@ -13,8 +14,18 @@ import snowballstemmer
 #: Regular expression for stripping comments from the wordlists
 COMMENT_RE = re.compile(r'\s*#.*')
 
-#: Stemmer function for stemming words in English
-stem = snowballstemmer.stemmer('english').stemWord
+# A stemmer keeps the word it is stemming in its attributes, so every thread
+# has its own stemmer.
+_local = threading.local()
+
+
+def stem(word: str) -> str:
+    """Return the stem of an English word."""
+    try:
+        stemmer = _local.stemmer
+    except AttributeError:
+        stemmer = _local.stemmer = snowballstemmer.stemmer('english')
+    return stemmer.stemWord(word)
 
 
 def load_wordlist(name: str) -> Iterator[str]:
@@ -0,0 +1,19 @@
+"""Helpers that are shared by the test modules."""
+
+from pydocstyle.config import ConfigurationParser
+
+__all__ = ('get_check_args',)
+
+
+def get_check_args(path, *options):
+    """Return the arguments with which the file `path` is checked.
+
+    `options` are command line options. The arguments are those generated
+    by `ConfigurationParser.get_files_to_check`, so that the tests follow
+    any change of their order.
+
+    """
+    conf = ConfigurationParser()
+    conf.parse([*options, path])
+    (args,) = conf.get_files_to_check()
+    return args
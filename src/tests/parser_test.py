@@ -1,12 +1,20 @@
 """Parser tests."""
 
+import ast
 import io
 import sys
 import pytest
 import textwrap
 from pathlib import Path
 
-from pydocstyle.parser import Parser, ParseError
+from pydocstyle.parser import (
+    PARSERS,
+    Docstring,
+    Lines,
+    Parser,
+    ParseError,
+    TokenStream,
+)
 
 
 class CodeSnippet(io.StringIO):
@@ -963,3 +971,162 @@ def test_parsing_method_decorators(code):
     function, = module.children[0].children
     decorator_names = {dec.name for dec in function.decorators}
     assert "property" in decorator_names
+
+
+def test_compact_values():
+    """Test that tokens and definitions are slotted and share token kinds."""
+    parser = Parser()
+    code = CodeSnippet("""\
+        class Test:
+            def method(self):
+                pass
+    """)
+    module = parser.parse(code, 'file_path')
+    for definition in module:
+        assert not hasattr(definition, '__dict__')
+        assert hash(definition) == hash(definition)
+    method = module.children[0].children[0]
+    assert method.function_args is None
+    assert method == method and method != module.children[0]
+
+    tokens = list(TokenStream(CodeSnippet("x = y\n")))
+    assert not hasattr(tokens[0], '__dict__')
+    assert tokens[0].kind is tokens[2].kind
+    assert repr(tokens[0].kind) == 'tk.NAME'
+
+
+@pytest.mark.parametrize('nested', [True, False])
+def test_skipped_function_bodies(nested):
+    """Test that function bodies are skipped without changing definitions."""
+    parser = Parser()
+    code = CodeSnippet('''\
+        def outer():
+            """Docstring."""
+            x = (1,
+        2)
+
+            def inner():
+                pass
+            return x
+
+
+        def other():
+            y = 1
+            if y:
+                return y
+        # A comment.
+
+        class A:
+            def method(self):
+                z = """
+        text"""
+                return z
+    ''')
+    module = parser.parse(code, 'file_path', nested=nested)
+    definitions = [(d.name, d.start, d.end) for d in module]
+    expected = [
+        ('file_path', 1, 22),
+        ('outer', 1, 10),
+        ('inner', 6, 7),
+        ('other', 11, 16),
+        ('A', 17, 21),
+        ('method', 18, 21),
+    ]
+    if not nested:
+        expected.remove(('inner', 6, 7))
+    assert definitions == expected
+
+
+@pytest.mark.parametrize('parser_name', sorted(PARSERS))
+@pytest.mark.parametrize('depth, expected', [
+    (0, ['file_path']),
+    (1, ['file_path', 'function', 'Class']),
+    (2, ['file_path', 'function', 'nested', 'Class', 'method', 'Nested']),
+])
+def test_parse_depth(parser_name, depth, expected):
+    """Test that definitions deeper than the parse depth are left out."""
+    parser = PARSERS[parser_name]()
+    code = CodeSnippet('''\
+        """Module docstring."""
+        __all__ = ['function', 'Class']
+
+        def function():
+            def nested():
+                pass
+
+        class Class:
+            def method(self):
+                pass
+
+            class Nested:
+                def nested_method(self):
+                    pass
+    ''')
+    module = parser.parse(code, 'file_path', depth=depth)
+    assert [definition.name for definition in module] == expected
+    assert module.docstring == '"""Module docstring."""'
+    assert module.end == 15
+    assert module.dunder_all == (None if depth == 0 else ('function', 'Class'))
+
+
+@pytest.mark.parametrize('literal', [
+    '""',
+    "''''''",
+    '"""Do something.\n\n    More text.\n    """',
+    "r'''Raw \\d text.'''",
+    'u"Unicode text."',
+    '"""Tab\\tescape."""',
+    '"""Line\\\ncontinuation."""',
+    '"""Carriage\r\nreturn."""',
+])
+def test_docstring_view(literal):
+    """Test that the parts of a docstring match its evaluated literal."""
+    docstring = Docstring(literal, 1, 1)
+    value = ast.literal_eval(literal)
+    assert docstring.value == value
+    assert docstring.lines == tuple(value.split('\n'))
+    assert docstring.literal_lines == tuple(literal.split('\n'))
+    assert docstring.stripped == value.strip()
+    assert docstring.summary == value.strip().split('\n')[0]
+    assert docstring.first_word == (value.split() or [None])[0]
+
+
+def test_definition_source_index():
+    """Test that the source of definitions is looked up in the module lines."""
+    parser = Parser()
+    code = CodeSnippet('''\
+        class Class:
+
+            def method(self): """Docstring."""
+
+            def other(self):
+                """Multi-line
+                docstring."""  # Comment.
+
+                return 1
+            # Trailing comment.
+
+        x = 1
+    ''')
+    module = parser.parse(code, 'file_path')
+    cls, method, other = list(module)[1:]
+    assert isinstance(module._source, Lines)
+    assert module._source.offset(2) == len('class Class:\n')
+    assert other.source == (
+        '    def other(self):\n'
+        '        """Multi-line\n'
+        '        docstring."""  # Comment.\n'
+        '\n'
+        '        return 1\n'
+    )
+    assert other.source_lines == other.source.splitlines(keepends=True)
+    assert method.docstring_indent == '    def method(self): '
+    assert other.docstring_indent == '        '
+    assert method.lines_before_docstring == []
+    assert method.lines_after_docstring == ['\n']
+    assert other.lines_before_docstring == ['    def other(self):\n']
+    assert other.lines_after_docstring == [
+        '  # Comment.\n',
+        '\n',
+        '        return 1\n',
+    ]
@@ -0,0 +1,155 @@
+"""Unit tests for the pydocstyle result cache.
+
+Use tox or pytest to run the test suite.
+"""
+
+import os
+import sqlite3
+
+from pydocstyle.cache import MemoryCache, ResultCache
+
+from .helpers import get_check_args
+
+__all__ = ()
+
+
+def test_get_and_put(tmp_path):
+    """Test that reports are returned for unchanged files only."""
+    path = str(tmp_path / 'example.py')
+    with open(path, 'w') as file:
+        file.write('')
+
+    cache = ResultCache(str(tmp_path / 'cache'))
+    assert cache.get(*get_check_args(path)) is None
+    cache.put(['report'], *get_check_args(path))
+    assert cache.get(*get_check_args(path)) == ['report']
+    assert cache.get(*get_check_args(path, '--select=D101')) is None
+    cache.close()
+
+    cache = ResultCache(str(tmp_path / 'cache'))
+    assert cache.get(*get_check_args(path)) == ['report']
+    with open(path, 'w') as file:
+        file.write('"""Docstring."""\n')
+    assert cache.get(*get_check_args(path)) is None
+    cache.close()
+
+
+def test_failures_are_not_stored(tmp_path):
+    """Test that reports of files that could not be checked are not stored."""
+    path = str(tmp_path / 'example.py')
+    with open(path, 'w') as file:
+        file.write('def')
+
+    cache = ResultCache(str(tmp_path / 'cache'))
+    cache.put([None], *get_check_args(path))
+    assert cache.get(*get_check_args(path)) is None
+    cache.close()
+
+
+def test_eviction(tmp_path):
+    """Test that the least recently used results are evicted."""
+    paths = []
+    for i in range(10):
+        paths.append(str(tmp_path / f'example_{i}.py'))
+        with open(paths[-1], 'w') as file:
+            file.write(f'x = {i}\n')
+
+    cache = ResultCache(str(tmp_path / 'cache'), max_size=1000)
+    for path in paths:
+        cache.put(['x' * 200], *get_check_args(path))
+    cache.close()
+
+    cache = ResultCache(str(tmp_path / 'cache'), max_size=1000)
+    assert cache.stats()['size'] <= 1000
+    assert cache.get(*get_check_args(paths[0])) is None
+    assert cache.get(*get_check_args(paths[-1])) is not None
+    cache.close()
+
+
+def test_prune(tmp_path):
+    """Test that results of deleted and changed files are pruned."""
+    deleted, changed, unchanged = (
+        str(tmp_path / f'{name}.py')
+        for name in ('deleted', 'changed', 'unchanged')
+    )
+    for path in (deleted, changed, unchanged):
+        with open(path, 'w') as file:
+            file.write('')
+
+    cache = ResultCache(str(tmp_path / 'cache'))
+    for path in (deleted, changed, unchanged):
+        cache.put([], *get_check_args(path))
+    os.remove(deleted)
+    with open(changed, 'w') as file:
+        file.write('x = 1\n')
+    cache.get(*get_check_args(changed))
+
+    assert cache.prune() == 2
+    assert cache.stats()['entries'] == 1
+    assert cache.get(*get_check_args(unchanged)) == []
+    cache.close()
+
+
+def test_concurrent_caches(tmp_path, monkeypatch):
+    """Test that several caches may be used at the same time."""
+    monkeypatch.setattr(ResultCache, 'BUSY_TIMEOUT', 1.0)
+    paths = []
+    for name in ('a', 'b'):
+        paths.append(str(tmp_path / f'{name}.py'))
+        with open(paths[-1], 'w') as file:
+            file.write('')
+
+    first = ResultCache(str(tmp_path / 'cache'))
+    second = ResultCache(str(tmp_path / 'cache'))
+    first.put(['a'], *get_check_args(paths[0]))
+    second.put(['b'], *get_check_args(paths[1]))
+    assert second.get(*get_check_args(paths[0])) == ['a']
+    assert first.get(*get_check_args(paths[1])) == ['b']
+    second.close()
+    first.close()
+
+    cache = ResultCache(str(tmp_path / 'cache'))
+    assert cache.get(*get_check_args(paths[0])) == ['a']
+    assert cache.get(*get_check_args(paths[1])) == ['b']
+    cache.close()
+
+
+def test_locked_cache(tmp_path, monkeypatch):
+    """Test that a cache that stays locked is not used."""
+    monkeypatch.setattr(ResultCache, 'BUSY_TIMEOUT', 0.1)
+    path = str(tmp_path / 'example.py')
+    with open(path, 'w') as file:
+        file.write('')
+
+    cache = ResultCache(str(tmp_path / 'cache'))
+    lock = sqlite3.connect(cache.path, isolation_level=None)
+    lock.execute('BEGIN EXCLUSIVE')
+    cache.put(['report'], *get_check_args(path))
+    assert cache.get(*get_check_args(path)) is None
+    assert cache.get_cost(path) is None
+    cache.close()
+    lock.execute('ROLLBACK')
+    lock.close()
+
+
+def test_memory_cache(tmp_path):
+    """Test that in-memory reports are returned for unchanged files only."""
+    path = str(tmp_path / 'example.py')
+    with open(path, 'w') as file:
+        file.write('')
+
+    results = {}
+    cache = MemoryCache(results)
+    assert cache.get(*get_check_args(path)) is None
+    cache.put(['report'], *get_check_args(path))
+    assert cache.get(*get_check_args(path)) == ['report']
+    assert cache.get(*get_check_args(path, '--select=D101')) is None
+    assert MemoryCache(results, explain=True).get(*get_check_args(path)) is None
+
+    with open(path, 'w') as file:
+        file.write('"""Docstring."""\n')
+    assert cache.get(*get_check_args(path)) is None
+
+    os.remove(path)
+    assert cache.prune() == 1
+    assert results == {}
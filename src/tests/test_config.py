@@ -0,0 +1,154 @@
+"""Unit tests for the discovery of configuration files.
+
+Use tox or pytest to run the test suite.
+"""
+
+import os
+
+from pydocstyle import config
+from pydocstyle.config import ConfigurationParser, walk, walk_paths
+
+__all__ = ()
+
+
+def test_config_files_read_once(tmp_path, monkeypatch):
+    """Test that configuration files are read once, until they change."""
+    reads = []
+
+    class RawConfigParser(config.RawConfigParser):
+        def read(self, filenames, encoding=None):
+            reads.append(filenames)
+            return super().read(filenames, encoding)
+
+    monkeypatch.setattr(config, 'RawConfigParser', RawConfigParser)
+    (tmp_path / 'tox.ini').write_text('[pydocstyle]\nselect = D100\n')
+    (tmp_path / 'setup.cfg').write_text('[metadata]\nname = example\n')
+    for name in ('a', 'b'):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / 'module.py').write_text('')
+
+    conf = ConfigurationParser()
+    conf.parse([str(tmp_path)])
+    files = list(conf.get_files_to_check())
+    assert [args[1] for args in files] == [['D100'], ['D100']]
+    assert sorted(reads) == [
+        str(tmp_path / 'setup.cfg'),
+        str(tmp_path / 'tox.ini'),
+    ]
+
+    # A changed configuration file is read again, the others are not.
+    del reads[:]
+    (tmp_path / 'tox.ini').write_text('[pydocstyle]\nselect = D100,D101\n')
+    stat = os.stat(tmp_path / 'tox.ini')
+    os.utime(tmp_path / 'tox.ini', ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert conf.forget_changed_configurations() == [str(tmp_path)]
+    files = list(conf.get_files_to_check())
+    assert [sorted(args[1]) for args in files] == [['D100', 'D101']] * 2
+    assert reads == [str(tmp_path / 'tox.ini')]
+
+
+def test_walk(tmp_path):
+    """Test that the walk is like `os.walk`, but excludes and dedupes."""
+    for directory in ('a/b', 'a/c', 'd', 'node_modules/e'):
+        os.makedirs(tmp_path / directory)
+        for name in ('x.py', 'y.py'):
+            (tmp_path / directory / name).write_text('')
+    top = str(tmp_path)
+
+    def no_excludes(directory, name):
+        return False
+
+    assert [
+        (root, set(dirs), set(filenames))
+        for root, dirs, filenames, _ in walk(top, no_excludes)
+    ] == [
+        (root, set(dirs), set(filenames))
+        for root, dirs, filenames in os.walk(top)
+    ]
+
+    # Links to directories are not followed, and linked files are checked
+    # once, unless the other link is not matched.
+    os.symlink(tmp_path / 'a', tmp_path / 'd' / 'loop')
+    os.symlink(tmp_path / 'a' / 'b' / 'x.py', tmp_path / 'd' / 'z.py')
+    os.link(tmp_path / 'a' / 'c' / 'x.py', tmp_path / 'd' / 'w.py')
+    os.link(tmp_path / 'd' / 'x.py', tmp_path / 'd' / 'test_x.py')
+
+    def checked_files(*args):
+        conf = ConfigurationParser()
+        conf.parse([*args, top])
+        return {
+            os.path.relpath(files[0], top).replace(os.sep, '/')
+            for files in conf.get_files_to_check()
+        }
+
+    walked = checked_files(f'--exclude=y.py,{tmp_path / "a" / "b"}')
+    assert len(walked) == 3
+    assert {'d/x.py', 'd/z.py'} < walked
+    assert walked - {'d/x.py', 'd/z.py'} <= {'a/c/x.py', 'd/w.py'}
+    walked = checked_files()
+    assert len(walked) == 6
+    assert {'a/b/y.py', 'a/c/y.py', 'd/x.py', 'd/y.py'} < walked
+
+
+def test_walk_paths(tmp_path):
+    """Test that walking the directories of files is like walking them."""
+    paths = ['x.py', 'a/y.py', 'a/b/z.py', 'a/b/w.py', 'c/d/x.py', 'e/x.py']
+    for path in paths:
+        os.makedirs(os.path.dirname(tmp_path / path), exist_ok=True)
+        (tmp_path / path).write_text('')
+    top = str(tmp_path)
+
+    def is_excluded(directory, name):
+        return name == 'e'
+
+    def walked(tree):
+        result = []
+        for root, dirs, filenames, _ in tree:
+            result.append((root, set(dirs), set(filenames)))
+            if os.path.basename(root) == 'c':
+                dirs.remove('d')
+        return sorted(result)
+
+    assert walked(walk_paths(top, paths, is_excluded)) == walked(
+        walk(top, is_excluded)
+    )
+
+
+def test_no_default_excludes(tmp_path):
+    """Test that directories that are excluded by default can be walked."""
+    for path in (
+        'pkg/build/core.py',
+        'pkg/.tox/x.py',
+        'pkg/node_modules/y.py',
+    ):
+        os.makedirs(os.path.dirname(tmp_path / path), exist_ok=True)
+        (tmp_path / path).write_text('')
+    top = str(tmp_path)
+
+    def checked_files(*args):
+        conf = ConfigurationParser()
+        conf.parse([*args, top])
+        return {
+            os.path.relpath(files[0], top).replace(os.sep, '/')
+            for files in conf.get_files_to_check()
+        }
+
+    assert checked_files() == set()
+    assert checked_files('--no-default-excludes', '--exclude=.tox') == {
+        'pkg/build/core.py',
+        'pkg/node_modules/y.py',
+    }
+
+
+def test_get_config_file_in_folder(tmp_path):
+    """Test that configuration files can be looked up on the class."""
+    (tmp_path / 'setup.cfg').write_text('[metadata]\nname = example\n')
+    (tmp_path / 'module.py').write_text('')
+    find = ConfigurationParser._get_config_file_in_folder
+    assert find(str(tmp_path)) is None
+    (tmp_path / 'tox.ini').write_text('[pydocstyle]\nselect = D100\n')
+    assert find(str(tmp_path)) == str(tmp_path / 'tox.ini')
+    assert find(str(tmp_path / 'module.py')) == str(tmp_path / 'tox.ini')
+    assert ConfigurationParser()._get_listed_config_file(str(tmp_path)) == (
+        str(tmp_path / 'tox.ini')
+    )
@@ -0,0 +1,80 @@
+"""Unit tests for the daemon and its socket.
+
+Use tox or pytest to run the test suite.
+"""
+
+import os
+import socket
+import threading
+
+import pytest
+
+from pydocstyle import daemon
+from pydocstyle.daemon import DaemonError, Server
+
+__all__ = ()
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, 'AF_UNIX'), reason='The daemon requires Unix sockets.'
+)
+
+
+def test_default_socket_path(tmp_path, monkeypatch):
+    """Test that the default socket is in a directory closed to others."""
+    monkeypatch.delenv('XDG_RUNTIME_DIR', raising=False)
+    monkeypatch.setattr(daemon.tempfile, 'gettempdir', lambda: str(tmp_path))
+    socket_path = daemon.get_default_socket_path()
+    directory = os.path.dirname(socket_path)
+    assert os.path.dirname(directory) == str(tmp_path)
+    assert os.stat(directory).st_mode & 0o777 == 0o700
+    assert daemon.get_default_socket_path() == socket_path
+
+    os.chmod(directory, 0o755)
+    with pytest.raises(DaemonError):
+        daemon.get_default_socket_path()
+    os.rmdir(directory)
+    os.symlink(tmp_path, directory)
+    with pytest.raises(DaemonError):
+        daemon.get_default_socket_path()
+
+
+def test_socket_of_another_user(tmp_path, monkeypatch):
+    """Test that a socket that belongs to another user is not used."""
+    socket_path = str(tmp_path / 'daemon.sock')
+    with open(socket_path, 'w'):
+        pass
+    uid = os.getuid()
+    monkeypatch.setattr(daemon.os, 'getuid', lambda: uid + 1)
+    with pytest.raises(DaemonError, match='another user'):
+        daemon.request(socket_path, 'status')
+    with pytest.raises(DaemonError, match='another user'):
+        Server(socket_path).serve_forever()
+    assert os.path.exists(socket_path)
+
+
+def test_invalid_requests(tmp_path, monkeypatch):
+    """Test that invalid or hanging requests do not stop the daemon."""
+    monkeypatch.setattr(daemon, 'REQUEST_TIMEOUT', 0.1)
+    socket_path = str(tmp_path / 'daemon.sock')
+    server = Server(socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        while not os.path.exists(socket_path):
+            thread.join(0.01)
+
+        # A client that connects and does not send anything times out.
+        hanging = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        hanging.connect(socket_path)
+        try:
+            for arguments in ({}, {'cwd': str(tmp_path)}, {'args': []}):
+                with pytest.raises(DaemonError, match='Invalid arguments'):
+                    daemon.request(socket_path, 'check', **arguments)
+            with pytest.raises(DaemonError, match='Unknown command'):
+                daemon.request(socket_path, 'unknown')
+        finally:
+            hanging.close()
+        assert daemon.request(socket_path, 'status')['runs'] == 0
+    finally:
+        daemon.request(socket_path, 'stop')
+        thread.join()
@@ -1,16 +1,20 @@
 """Old parser tests."""
 
+import asyncio
 import os
 import re
 import pytest
+from unittest import mock
+from pydocstyle.aio import acheck
 from pydocstyle.violations import Error, ErrorRegistry
-from pydocstyle.checker import check
+from pydocstyle.checker import ConventionChecker, check, check_sources
 from pydocstyle.config import ConfigurationParser
+from pydocstyle.parser import Module
 
 DEFAULT_PROPERTY_DECORATORS = ConfigurationParser.DEFAULT_PROPERTY_DECORATORS
 
 
-@pytest.mark.parametrize('test_case', [
+TEST_CASES = [
     'test',
     'unicode_literals',
     'nested_class',
@@ -26,7 +30,27 @@ DEFAULT_PROPERTY_DECORATORS = ConfigurationParser.DEFAULT_PROPERTY_DECORATORS
     'canonical_google_examples',
     'canonical_numpy_examples',
     'canonical_pep257_examples',
-])
+]
+
+TEST_CASE_DIR = os.path.join(os.path.normcase(os.path.dirname(__file__)),
+                             'test_cases')
+
+
+def _test_case_file(test_case):
+    """Return the path of the module of `test_case`."""
+    return os.path.join(TEST_CASE_DIR, test_case + '.py')
+
+
+def _check_kwargs():
+    """Return the keyword arguments of `check` for the test cases."""
+    return dict(
+        select=set(ErrorRegistry.get_error_codes()),
+        ignore_decorators=re.compile('wraps|ignored_decorator'),
+        property_decorators=DEFAULT_PROPERTY_DECORATORS,
+    )
+
+
+@pytest.mark.parametrize('test_case', TEST_CASES)
 def test_complex_file(test_case):
     """Run domain-specific tests from test.py file."""
     case_module = __import__(f'test_cases.{test_case}',
@@ -50,3 +74,143 @@ def test_complex_file(test_case):
         assert isinstance(error, Error)
     results = {(e.definition.name, e.message) for e in results}
     assert case_module.expectation.expected == results
+
+
+@pytest.mark.parametrize('test_case', TEST_CASES)
+def test_selected_codes(test_case):
+    """Check that skipping unselected checks does not change the results."""
+    test_case_file = _test_case_file(test_case)
+    kwargs = _check_kwargs()
+    all_codes = kwargs.pop('select')
+    results = [
+        (e.code, e.definition.name, e.message)
+        for e in check([test_case_file], select=all_codes, **kwargs)
+    ]
+    for code in all_codes:
+        assert [
+            (e.code, e.definition.name, e.message)
+            for e in check([test_case_file], select={code}, **kwargs)
+        ] == [result for result in results if result[0] == code]
+
+
+@pytest.mark.parametrize('test_case', TEST_CASES)
+def test_ast_parser(test_case):
+    """Check that the `ast` parser gives the same results as the default."""
+    test_case_file = _test_case_file(test_case)
+    kwargs = _check_kwargs()
+    results = [
+        [(e.code, e.line, str(e.definition), e.message, e.lines)
+         for e in check([test_case_file], parser=parser, **kwargs)]
+        for parser in ('token', 'ast')
+    ]
+    assert results[0] == results[1]
+
+
+@pytest.mark.parametrize('test_case', TEST_CASES)
+def test_incremental_check(test_case, tmp_path):
+    """Check that unchanged definitions are not checked again."""
+    with open(_test_case_file(test_case), 'rb') as file:
+        source = file.read()
+    path = str(tmp_path / (test_case + '.py'))
+    kwargs = _check_kwargs()
+
+    def get_results(memo):
+        return [(e.code, e.line, str(e.definition), e.message, e.lines)
+                for e in check([path], memo=memo, **kwargs)]
+
+    with open(path, 'wb') as file:
+        file.write(source)
+    memo = {}
+    expected = get_results(None)
+    assert get_results(memo) == expected
+    with mock.patch.object(ConventionChecker, '_get_check_plan',
+                           side_effect=AssertionError('checked again')):
+        assert get_results(memo) == expected
+
+    # Moving all the definitions down only checks the module again.
+    with open(path, 'wb') as file:
+        file.write(b'\n\n' + source)
+    expected = get_results(None)
+    with mock.patch.object(ConventionChecker, '_get_check_plan',
+                           wraps=ConventionChecker._get_check_plan) as plan:
+        assert get_results(memo) == expected
+    assert [args[0] for args, _ in plan.call_args_list] == [Module]
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_check_sources(jobs):
+    """Check that in-memory sources give the same results as files."""
+    filenames = [_test_case_file(test_case) for test_case in TEST_CASES]
+    kwargs = _check_kwargs()
+    sources = []
+    for filename in filenames:
+        with open(filename, 'rb') as file:
+            sources.append((filename, file.read()))
+    # The sources may be given as text as well.
+    sources[0] = (sources[0][0], sources[0][1].decode('utf-8'))
+
+    def summarize(errors):
+        return [(e.code, e.line, str(e.definition), e.message, e.lines)
+                for e in errors]
+
+    results = [
+        (filename, summarize(errors))
+        for filename, errors in check_sources(sources, jobs=jobs, **kwargs)
+    ]
+    assert results == [
+        (filename, summarize(check([filename], **kwargs)))
+        for filename in filenames
+    ]
+
+
+def test_acheck():
+    """Check that the asyncio API gives the same results as `check`."""
+    filenames = [_test_case_file(test_case) for test_case in TEST_CASES]
+    kwargs = _check_kwargs()
+
+    async def get_results():
+        return [(e.filename, e.code, e.line, e.message)
+                async for e in acheck(filenames, concurrency=2, **kwargs)]
+
+    # `asyncio.run` is not available on Python 3.6.
+    loop = asyncio.new_event_loop()
+    try:
+        results = loop.run_until_complete(get_results())
+    finally:
+        loop.close()
+    assert sorted(results) == sorted(
+        (e.filename, e.code, e.line, e.message)
+        for e in check(filenames, **kwargs)
+    )
+
+
+def test_threaded_check():
+    """Check that a checker can check several sources at the same time."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    sources = []
+    for test_case in TEST_CASES:
+        filename = _test_case_file(test_case)
+        with open(filename) as file:
+            sources.append((filename, file.read()))
+    checker = ConventionChecker()
+    select = set(ErrorRegistry.get_error_codes())
+
+    def check_source(args):
+        filename, source = args
+        return [
+            (e.code, e.line, e.message, e.format(explain=True, source=True))
+            for e in checker.check_source(
+                source,
+                filename,
+                property_decorators=DEFAULT_PROPERTY_DECORATORS,
+                checked_codes=select,
+            )
+        ]
+
+    expected = [check_source(args) for args in sources]
+    with ThreadPoolExecutor(4) as executor:
+        for _ in range(3):
+            assert list(executor.map(check_source, sources)) == expected
+    # Formatting with options does not change the defaults.
+    assert Error.explain is False and Error.source is False
@@ -7,10 +7,12 @@ import shlex
 import shutil
 import pytest
 import pathlib
+import queue
 import tempfile
 import textwrap
 import subprocess
 import sys
+import threading
 
 from unittest import mock
 
@@ -440,6 +442,22 @@ def test_verbose(env):
     assert 'example.py' in out
 
 
+def test_trace(env):
+    """Test that the parsing of every token is only printed with --trace."""
+    with env.open('example.py', 'wt') as example:
+        example.write('"""Module docstring."""\n')
+
+    out, _, code = env.invoke(args="--debug")
+    assert code == 0
+    assert 'starting in debug mode.' in out
+    assert 'parsing definition list' not in out
+
+    out, _, code = env.invoke(args="--trace")
+    assert code == 0
+    assert 'starting in debug mode.' in out
+    assert 'parsing definition list' in out
+
+
 def test_count(env):
     """Test that passing --count correctly prints the error num."""
     with env.open('example.py', 'wt') as example:
@@ -1584,4 +1602,487 @@ def test_match_considers_basenames_for_path_args(env):
     # env.invoke calls pydocstyle with full path to test_a.py
     out, _, code = env.invoke(target='test_a.py')
     assert '' == out
-    assert code == 0
\ No newline at end of file
+    assert code == 0
+
+def test_jobs(env):
+    """Test that checking files in parallel gives the same results.
+
+    Enough files are created so that a worker pool is actually used.
+
+    """
+    for i in range(40):
+        with env.open(f'example_{i}.py', 'wt') as example:
+            example.write(textwrap.dedent(f"""\
+                def foo_{i}():
+                    pass
+            """))
+
+    serial_out, _, serial_code = env.invoke(args='--count')
+    for jobs in ('2', 'auto'):
+        out, err, code = env.invoke(args=f'--count --jobs={jobs}')
+        assert code == serial_code == 1
+        assert out == serial_out
+        assert '80' == out.split('\n')[-2].strip()
+
+
+def test_illegal_jobs(env):
+    """Test that an illegal number of jobs is rejected."""
+    for jobs in ('0', '-1', 'many'):
+        _, err, code = env.invoke(args=f'--jobs={jobs}')
+        assert code == 2
+        assert 'Illegal number of jobs' in err
+
+
+def test_exclude(env):
+    """Test that excluded files and directories are not walked.
+
+    env_base
+    +-- a.py
+    +-- generated_pb2.py
+    +-- build
+    |   +-- b.py
+    +-- pkg
+        +-- c.py
+        +-- loop -> ..
+        +-- vendor
+            +-- d.py
+
+    Every file violates D100. `build` is excluded by default, and the others
+    by `--exclude`, but not when they are given explicitly. The symbolic link
+    is not followed.
+
+    """
+    env.makedirs('build')
+    env.makedirs(os.path.join('pkg', 'vendor'))
+    for path in ('a.py', 'generated_pb2.py', os.path.join('build', 'b.py'),
+                 os.path.join('pkg', 'c.py'),
+                 os.path.join('pkg', 'vendor', 'd.py')):
+        with env.open(path, 'wt') as module:
+            module.write('')
+    if hasattr(os, 'symlink'):
+        os.symlink(os.pardir, env.get_path('loop', prefix='pkg'))
+
+    def checked_files(args='', target=None):
+        out, _, code = env.invoke(args=args, target=target)
+        assert code == 1
+        return sorted(
+            os.path.relpath(line.split(':')[0], env.tempdir)
+            for line in out.splitlines() if not line[:1].isspace()
+        )
+
+    assert checked_files() == [
+        'a.py',
+        'generated_pb2.py',
+        os.path.join('pkg', 'c.py'),
+        os.path.join('pkg', 'vendor', 'd.py'),
+    ]
+    vendor = env.get_path('vendor', prefix='pkg')
+    assert checked_files(f'--exclude=*_pb2.py,{vendor}') == [
+        'a.py',
+        os.path.join('pkg', 'c.py'),
+    ]
+    assert checked_files(target='build') == [os.path.join('build', 'b.py')]
+
+
+def test_files_from(env):
+    """Test that the paths to check can be listed in a file.
+
+    The listed files are checked with the configuration of their
+    directories, and the listed directories are walked.
+
+    """
+    env.write_config(prefix='A', select='D103')
+    env.makedirs(os.path.join('B', 'C'))
+    for path in ('d.py', os.path.join('A', 'a.py'), os.path.join('B', 'b.py'),
+                 os.path.join('B', 'C', 'c.py')):
+        with env.open(path, 'wt') as module:
+            module.write('def foo():\n    pass\n')
+    with env.open('paths.txt', 'wt') as paths:
+        paths.write('\n'.join([
+            env.get_path('a.py', prefix='A'),
+            '',
+            env.get_path('B'),
+        ]) + '\n')
+    listed_errors = {
+        'a.py': {'D103'},
+        'b.py': {'D100', 'D103'},
+        'c.py': {'D100', 'D103'},
+    }
+
+    paths_file = env.get_path('paths.txt')
+    out, _, code = env.invoke(args=f'--files-from={paths_file}',
+                              target='d.py')
+    assert code == 1
+    assert parse_errors(out) == dict(listed_errors, **{
+        'd.py': {'D100', 'D103'},
+    }), out
+
+    out, _, code = env.invoke(args=f'@{paths_file}',
+                              target=os.path.join('A', 'a.py'))
+    assert code == 1
+    assert parse_errors(out) == listed_errors, out
+
+    _, err, code = env.invoke(args='--files-from=missing.txt', target='d.py')
+    assert code == 2
+    assert 'Cannot read the paths to check' in err
+
+
+def test_ast_parser(env):
+    """Test that the `ast` parser gives the same results as the default."""
+    with env.open('example.py', 'wt') as example:
+        example.write(textwrap.dedent("""\
+            # noqa: D100
+            __all__ = ('foo', 'Bar')
+
+            @decorator(argument)
+            def foo(a, *, b):
+                '''Summary.
+
+                Args:
+                    a: The a.
+                '''
+
+            class Bar:
+                def baz(self): pass  # noqa
+        """))
+
+    out, _, code = env.invoke(args='--convention=google')
+    ast_out, _, ast_code = env.invoke(args='--convention=google --parser=ast')
+    assert code == ast_code == 1
+    assert 'D417' in out
+    assert ast_out == out
+
+
+def test_illegal_parser(env):
+    """Test that an unknown parser is rejected."""
+    _, err, code = env.invoke(args='--parser=regex')
+    assert code == 2
+    assert "Illegal parser 'regex'" in err
+
+
+def test_violations_are_streamed(env):
+    """Test that violations are written as soon as their file is checked.
+
+    Files in the base directory are checked before the illegal configuration
+    file in the sub directory is discovered, so their violations are printed
+    even though the run then fails.
+
+    """
+    with env.open('example.py', 'wt') as example:
+        example.write('')
+    env.write_config(prefix='sub', select="D100", ignore="D101")
+    with env.open(os.path.join('sub', 'sub_example.py'), 'wt') as example:
+        example.write('')
+
+    out, err, code = env.invoke()
+    assert code == 2
+    assert 'example.py' in out
+    assert 'D100' in out
+    assert 'sub_example.py' not in out
+    assert 'mutually exclusive' in err
+
+
+def test_cache_dir(env):
+    """Test that cached results are reused only for unchanged files."""
+    with env.open('example.py', 'wt') as example:
+        example.write('')
+    cache_dir = env.get_path('cache')
+    args = f'--cache-dir={cache_dir} --count'
+
+    first_out, _, code = env.invoke(args=args)
+    assert code == 1
+    assert 'D100' in first_out
+    out, _, code = env.invoke(args=args)
+    assert code == 1
+    assert out == first_out
+
+    with env.open('example.py', 'wt') as example:
+        example.write('"""Module docstring."""\n')
+    out, _, code = env.invoke(args=args)
+    assert code == 0
+    assert 'D100' not in out
+
+    # The formatting options are part of the key.
+    out, _, code = env.invoke(args=args + ' --select=D100,D103 --source')
+    assert code == 0
+
+    out, err, code = env.invoke(args=f'--cache-dir={cache_dir} --cache-prune')
+    assert code == 0, err
+    assert 'Removed 1 results' in out
+    assert 'Results: 2 for 1 files' in out
+
+
+def test_cache_command_requires_cache_dir(env):
+    """Test that --cache-stats cannot be used without --cache-dir."""
+    _, err, code = env.invoke(args='--cache-stats')
+    assert code == 2
+    assert 'require --cache-dir' in err
+
+
+def test_diff(env):
+    """Test that only definitions changed since a git revision are checked."""
+    with env.open('changed.py', 'wt') as changed:
+        changed.write(textwrap.dedent('''\
+            """Module docstring."""
+            def foo():
+                pass
+            def bar():
+                pass
+        '''))
+    with env.open('unchanged.py', 'wt') as unchanged:
+        unchanged.write('def baz():\n    pass\n')
+
+    def run(*args):
+        return subprocess.run(
+            args,
+            cwd=env.tempdir,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+
+    git = ('git', '-c', 'user.name=test', '-c', 'user.email=test@example.com')
+    assert run(*git, 'init', '-q').returncode == 0
+    assert run(*git, 'add', '.').returncode == 0
+    assert run(*git, 'commit', '-q', '-m', 'Initial commit').returncode == 0
+
+    with env.open('changed.py', 'at') as changed:
+        changed.write('    return 1\n')
+    # The configuration of the repository does not change the diff.
+    for config in ('diff.noprefix=false', 'diff.noprefix=true'):
+        assert run('git', 'config', *config.split('=')).returncode == 0
+        result = run(env.script_name, '.', '--diff=HEAD')
+        assert result.returncode == 1, result.stderr
+        assert 'bar' in result.stdout
+        assert 'foo' not in result.stdout
+        assert 'unchanged.py' not in result.stdout
+
+    result = run(env.script_name, '.', '--diff=no-such-revision')
+    assert result.returncode == 2
+    assert 'git diff' in result.stderr
+
+
+def test_git_files(env):
+    """Test that files can be found with git instead of walking directories.
+
+    env_base
+    +-- .gitignore
+    |   Ignores `generated`.
+    +-- tracked.py
+    +-- untracked.py
+    +-- deleted.py
+    |   Tracked, but deleted.
+    +-- generated
+    |   +-- ignored.py
+    +-- A
+        +-- tox.ini
+        |   This configuration will set `match-dir=B`.
+        +-- a.py
+        +-- B
+        |   +-- b.py
+        +-- C
+            +-- c.py
+
+    """
+    env.write_config(prefix='A', match_dir='B')
+    env.makedirs('generated')
+    env.makedirs(os.path.join('A', 'B'))
+    env.makedirs(os.path.join('A', 'C'))
+    for path in ('tracked.py', 'deleted.py', os.path.join('A', 'a.py'),
+                 os.path.join('A', 'B', 'b.py'),
+                 os.path.join('A', 'C', 'c.py')):
+        with env.open(path, 'wt') as module:
+            module.write('')
+    with env.open('.gitignore', 'wt') as gitignore:
+        gitignore.write('generated/\n')
+
+    def run(*args):
+        return subprocess.run(
+            args,
+            cwd=env.tempdir,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+
+    git = ('git', '-c', 'user.name=test', '-c', 'user.email=test@example.com')
+    assert run(*git, 'init', '-q').returncode == 0
+    assert run(*git, 'add', '.').returncode == 0
+    assert run(*git, 'commit', '-q', '-m', 'Initial commit').returncode == 0
+    os.remove(env.get_path('deleted.py'))
+    for path in ('untracked.py', os.path.join('generated', 'ignored.py')):
+        with env.open(path, 'wt') as module:
+            module.write('')
+
+    result = run(env.script_name, '--git-files', '.')
+    assert result.returncode == 1, result.stderr
+    assert set(parse_errors(result.stdout)) == {
+        'tracked.py', 'untracked.py', 'a.py', 'b.py',
+    }, result.stdout
+    result = run(env.script_name, '.')
+    assert set(parse_errors(result.stdout)) == {
+        'tracked.py', 'untracked.py', 'ignored.py', 'a.py', 'b.py',
+    }, result.stdout
+
+
+def test_public_names():
+    """Test that the public names are exported, and imported lazily."""
+    code = textwrap.dedent('''\
+        import sys
+        import pydocstyle
+        assert 'pydocstyle.checker' not in sys.modules
+        assert 'check' in dir(pydocstyle)
+        namespace = {}
+        exec('from pydocstyle import *', namespace)
+        print(sorted(name for name in namespace if name != '__builtins__'))
+    ''')
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == str(
+        [
+            'AllError',
+            'ConventionChecker',
+            'Error',
+            '__version__',
+            'acheck',
+            'check',
+            'check_sources',
+            'conventions',
+        ]
+    )
+
+
+def test_daemon(env):
+    """Test that the daemon checks files and notices changed files."""
+    with env.open('example.py', 'wt') as example:
+        example.write('def foo():\n    pass\n')
+    socket_path = env.get_path('daemon.sock')
+
+    def run(*args):
+        return subprocess.run(
+            (sys.executable, '-m', 'pydocstyle.daemon')
+            + (f'--socket={socket_path}',)
+            + args,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+
+    result = run('status')
+    assert result.returncode == 2
+    assert 'not running' in result.stderr
+
+    try:
+        result = run('check', env.tempdir)
+        assert result.returncode == 1, result.stderr
+        assert 'D100' in result.stdout
+        assert 'D103' in result.stdout
+        first_out = result.stdout
+        result = run('check', env.tempdir)
+        assert result.returncode == 1, result.stderr
+        assert result.stdout == first_out
+
+        with env.open('example.py', 'wt') as example:
+            example.write('"""Module docstring."""\n')
+        result = run('check', env.tempdir)
+        assert result.returncode == 0, result.stderr
+        assert result.stdout == ''
+
+        env.write_config(select='D101')
+        with env.open('example.py', 'wt') as example:
+            example.write('class Foo:\n    pass\n')
+        result = run('check', env.tempdir)
+        assert result.returncode == 1, result.stderr
+        assert 'D101' in result.stdout
+        assert 'D100' not in result.stdout
+
+        result = run('status')
+        assert result.returncode == 0, result.stderr
+        assert 'Runs: 4' in result.stdout
+    finally:
+        result = run('stop')
+    assert result.returncode == 0, result.stderr
+    assert not os.path.exists(socket_path)
+
+
+def test_watch(env):
+    """Test that --watch checks files again when they change."""
+    with env.open('example.py', 'wt') as example:
+        example.write('def foo():\n    pass\n')
+    process = subprocess.Popen(
+        [env.script_name, env.tempdir, '--watch'],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+
+    # Lines are read in a thread, so that a hanging run fails the test.
+    lines = queue.Queue()
+    threading.Thread(
+        target=lambda: [lines.put(line) for line in process.stdout],
+        daemon=True,
+    ).start()
+
+    def read_round():
+        out = ''
+        while 'Watching for changes' not in out:
+            out += lines.get(timeout=30)
+        return out
+
+    try:
+        out = read_round()
+        assert 'D100' in out
+        assert 'D103' in out
+        assert 'Checked 1 files, found 2 violations' in out
+
+        env.write_config(select='D103')
+        out = read_round()
+        assert 'D103' in out
+        assert 'D100' not in out
+        assert 'Checked 1 files, found 1 violations' in out
+
+        with env.open('example.py', 'wt') as example:
+            example.write('def foo():\n    """Do nothing."""\n')
+        out = read_round()
+        assert 'Checked 1 files, found 0 violations' in out
+    finally:
+        process.terminate()
+        process.communicate()
+
+
+def test_watch_without_cache(env):
+    """Test that --watch keeps results in memory if the cache cannot open."""
+    with env.open('example.py', 'wt') as example:
+        example.write('def foo():\n    pass\n')
+    with env.open('not_a_directory', 'wt') as not_a_directory:
+        not_a_directory.write('')
+    cache_dir = os.path.join(env.tempdir, 'not_a_directory')
+    process = subprocess.Popen(
+        [env.script_name, env.tempdir, '--watch', f'--cache-dir={cache_dir}'],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    try:
+        out = ''
+        while 'Watching for changes' not in out:
+            line = process.stdout.readline()
+            assert line, process.stderr.read()
+            out += line
+        assert 'Checked 1 files, found 2 violations' in out
+    finally:
+        process.terminate()
+        _, err = process.communicate()
+    assert 'Cannot open cache, checking without it' in err
+
+
+def test_illegal_watch(env):
+    """Test that --watch cannot be used with --diff."""
+    _, err, code = env.invoke(args='--watch --diff=HEAD')
+    assert code == 2
+    assert '--watch cannot be used with --diff' in err
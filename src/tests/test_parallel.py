@@ -0,0 +1,111 @@
+"""Unit tests for the scheduling of parallel runs.
+
+Use tox or pytest to run the test suite.
+"""
+
+from pydocstyle import parallel
+from pydocstyle.cache import MemoryCache
+from pydocstyle.checker import check_sources
+from pydocstyle.config import ConfigurationParser
+from pydocstyle.parallel import check_files, imap_in_pool, schedule_chunks
+
+from .helpers import get_check_args
+
+__all__ = ()
+
+
+def test_schedule_chunks(tmp_path):
+    """Test that expensive files are scheduled first, and cheap ones batched."""
+    files = []
+    for name, size in [
+        ('small_1', 10),
+        ('large', 10000),
+        ('small_2', 10),
+        ('medium', 1000),
+        ('small_3', 10),
+    ]:
+        path = str(tmp_path / f'{name}.py')
+        with open(path, 'w') as file:
+            file.write('#' * size)
+        files.append(get_check_args(path))
+
+    chunks = schedule_chunks(files, jobs=1)
+    assert [[index for index, _ in chunk] for chunk in chunks] == [
+        [1],
+        [3, 0],
+        [2, 4],
+    ]
+    assert all(
+        files[index] == args for chunk in chunks for index, args in chunk
+    )
+
+    # Known costs take precedence over sizes.
+    cache = MemoryCache()
+    cache.put([], *files[0], cost=100.0)
+    cache.put([], *files[1], cost=0.1)
+    chunks = schedule_chunks(files, jobs=2, cache=cache)
+    assert chunks[0] == [(0, files[0])]
+
+    # Files without cost are spread over the workers too.
+    for args in files:
+        with open(args[0], 'w'):
+            pass
+    chunks = schedule_chunks(files, jobs=2)
+    assert sorted(len(chunk) for chunk in chunks) == [1, 1, 1, 1, 1]
+
+
+def test_check_files_in_windows(tmp_path, monkeypatch):
+    """Test that files are consumed a window at a time with several jobs."""
+    monkeypatch.setattr(parallel, 'threads_are_parallel', lambda: True)
+    monkeypatch.setattr(parallel, 'MIN_FILES_FOR_PARALLEL', 2)
+    monkeypatch.setattr(parallel, 'WINDOW_SIZE', 4)
+    for index in range(10):
+        (tmp_path / f'file_{index}.py').write_text('def f():\n    pass\n')
+    conf = ConfigurationParser()
+    conf.parse(['--select=D100,D103', str(tmp_path)])
+    run_conf = conf.get_user_run_configuration()
+    files = list(conf.get_files_to_check())
+    consumed = []
+
+    def generate_files():
+        for args in files:
+            consumed.append(args)
+            yield args
+
+    results = []
+    for reports in check_files(generate_files(), run_conf._replace(jobs=2)):
+        results.append(reports)
+        assert len(consumed) - len(results) < 4
+    assert results == list(check_files(files, run_conf._replace(jobs=1)))
+    assert len(results) == 10
+
+
+def test_imap_in_threads():
+    """Test that a pool of threads generates the results of all items."""
+    items = range(100)
+    expected = [item * item for item in items]
+    results = imap_in_pool(lambda item: item * item, items, 4, threads=True)
+    assert list(results) == expected
+    results = imap_in_pool(
+        lambda item: item * item, items, 4, ordered=False, threads=True
+    )
+    assert sorted(results) == expected
+
+
+def test_check_sources_in_threads(monkeypatch):
+    """Test that sources checked in threads have the same errors."""
+    monkeypatch.setattr(parallel, 'threads_are_parallel', lambda: True)
+    sources = [
+        (f'file_{index}.py', f'def function_{index}():\n    """Do it"""\n')
+        for index in range(20)
+    ]
+
+    def summarize(results):
+        return [
+            (filename, [(e.code, e.line, e.message) for e in errors])
+            for filename, errors in results
+        ]
+
+    assert summarize(check_sources(sources, jobs=4)) == summarize(
+        check_sources(sources)
+    )
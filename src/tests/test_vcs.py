@@ -0,0 +1,69 @@
+"""Unit tests for the parsing of git diffs.
+
+Use tox or pytest to run the test suite.
+"""
+
+import textwrap
+
+from pydocstyle.vcs import parse_diff
+
+__all__ = ()
+
+
+def test_parse_diff():
+    """Test that changed lines are parsed from a diff without context."""
+    output = textwrap.dedent(
+        '''\
+        diff --git a/a.py b/a.py
+        index 0000000..1111111 100644
+        --- a/a.py
+        +++ b/a.py
+        @@ -1,0 +2,3 @@ def foo():
+        +    x = 1
+        +    y = 2
+        +    z = 3
+        @@ -10 +12 @@ def bar():
+        -    pass
+        +    return
+        @@ -20,2 +21,0 @@ def baz():
+        -    a = 1
+        -    b = 2
+        @@ -1,3 +0,0 @@
+        -import os
+        -import re
+        -import sys
+        diff --git a/b.py b/b.py
+        new file mode 100644
+        --- /dev/null
+        +++ "b/caf\\303\\251.py"
+        @@ -0,0 +1,2 @@
+        +def foo():
+        +    pass
+    '''
+    )
+    assert parse_diff(output) == {
+        'a.py': [(2, 4), (12, 12), (21, 22), (1, 1)],
+        'café.py': [(1, 2)],
+    }
+
+
+def test_parse_diff_header_like_lines():
+    """Test that the lines of a hunk are not parsed as file headers."""
+    output = textwrap.dedent(
+        '''\
+        diff --git a/a.py b/a.py
+        index 0000000..1111111 100644
+        --- a/a.py
+        +++ b/a.py
+        @@ -2,2 +2,2 @@ def foo():
+        --- x
+        -    pass
+        \\ No newline at end of file
+        +++ x
+        ++ b/b.py
+        @@ -8 +8 @@ def bar():
+        -    pass
+        +    return
+    '''
+    )
+    assert parse_diff(output) == {'a.py': [(2, 3), (8, 8)]}